@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+
+from blob_store import BlobStore, copy_blob
+from textstore import PAGE_TEXT_FIELD
+
+# Orders still being extracted are never archived, their jobs expect the hot document
+ARCHIVABLE_STATUSES = ["indexed", "no_text"]
+# What stays in the hot collection: enough for lists, search by number, customer and
+# stone type, duplicate detection and the PDF download. The full text moves out.
+STUB_FIELDS = (
+    "id", "order_number", "order_number_key", "customer_name", "customer_name_key", "stone_type", "stone_type_key",
+    "pdf_file_id", "pdf_size", "pdf_sha256", "page_count", "upload_date",
+)
+
+
+def archive_query(older_than: datetime) -> dict:
+    # Legacy orders with an inline base64 PDF have nothing to move to cold storage; migrate them first
+    return {"upload_date": {"$lt": older_than}, "status": {"$in": ARCHIVABLE_STATUSES}, "pdf_content": None}
+
+
+def make_stub(order: dict, archived_at: datetime) -> dict:
+    stub = {name: order[name] for name in STUB_FIELDS if name in order}
+    stub.update(status="archived", archived_at=archived_at, updated_at=archived_at)
+    return stub
+
+
+async def archive_order(
+    db,
+    order: dict,
+    archived_at: datetime,
+    hot_store: Optional[BlobStore] = None,
+    cold_store: Optional[BlobStore] = None,
+    tmp_dir: str = None,
+) -> Optional[dict]:
+    """Move one order and its page texts to ``orders_archive`` and leave a stub behind.
+
+    With a ``cold_store`` the PDF is copied there and removed from ``hot_store``.
+    Returns the stub, or None if the order was changed or deleted meanwhile.
+    Safe to retry: every step either overwrites or is undone on a lost race.
+    """
+    order_id = order["id"]
+    pages = await db.order_pages.find(
+        {"order_id": order_id}, projection={"_id": 0, "text": 1, PAGE_TEXT_FIELD: 1},
+    ).sort("page", 1).to_list(None)
+
+    stub = make_stub(order, archived_at)
+    moved = cold_store is not None and order.get("pdf_file_id")
+    if moved:
+        stub["pdf_file_id"] = await copy_blob(
+            hot_store, cold_store, order["pdf_file_id"], f"{order_id}.pdf",
+            metadata={"sha256": order.get("pdf_sha256"), "content_type": "application/pdf"}, tmp_dir=tmp_dir,
+        )
+        stub["pdf_storage"] = "archive"
+
+    # Page texts are moved as stored, compressed or (not yet migrated) plain
+    texts = [page.get(PAGE_TEXT_FIELD, page.get("text")) for page in pages]
+    archived = dict(order, pages=texts, archived_at=archived_at)
+    archived.update({name: stub[name] for name in ("pdf_file_id", "pdf_storage") if name in stub})
+    await db.orders_archive.replace_one({"id": order_id}, archived, upsert=True)
+
+    # Only replace the version that was read, a concurrent delete or re-extraction wins
+    result = await db.orders.replace_one({"id": order_id, "status": order["status"]}, stub)
+    if not result.matched_count:
+        await db.orders_archive.delete_one({"id": order_id})
+        if moved:
+            await cold_store.delete(stub["pdf_file_id"])
+        return None
+
+    await db.order_pages.delete_many({"order_id": order_id})
+    if moved:
+        await hot_store.delete(order["pdf_file_id"])
+    return stub
@@ -0,0 +1,335 @@
+"""Offline benchmark and load test for the order API.
+
+Drives the FastAPI app in-process through httpx's ASGI transport, against
+mongomock by default or a local mongod with ``--mongo-url``. Nothing leaves
+the machine. Run from the backend directory:
+
+    python benchmarks/bench_api.py [--scenarios upload,search,list] [--orders 10000,100000]
+                                   [--uploads 50] [--mongo-url mongodb://localhost:27017]
+                                   [--out results.json] [--compare baseline.json]
+
+Scenarios:
+
+* ``upload``: upload throughput and latency for a synthetic PDF corpus
+  (``--uploads`` files, ``--min-pages``/``--max-pages``), ``--concurrency``
+  requests in flight.
+* ``search``: search latency per search type after seeding the collection
+  to each size in ``--orders``. mongomock has no ``$text`` support, so only
+  order number searches run there; use a mongod for the full set and for
+  100k/1M orders.
+* ``list``: latency of walking ``--list-pages`` pages of ``GET /api/orders``.
+
+The response cache is disabled so every request reaches MongoDB; pass
+``--response-cache`` to measure the cached path instead. ``--compare``
+checks every ``*_ms`` value against an earlier result file and exits with
+status 1 if one got slower than ``--threshold``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import generate_corpus, synthetic_orders  # noqa: E402
+
+SEARCHES = [
+    ("order_number", "A-2023-00"),
+    ("order_number", "A-2020-000042"),
+    ("customer_name", "Müller"),
+    ("stone_type", "Granit"),
+    ("all", "Grabplatte Inschrift"),
+]
+TEXT_SEARCH_TYPES = {"customer_name", "stone_type", "all"}
+
+
+def summarize(latencies) -> dict:
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_env(args, storage_dir: str):
+    # Must run before server is imported, it reads its configuration at import time
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["RUN_EMBEDDED_WORKER"] = "false"
+    os.environ["METRICS_ENABLED"] = "false"
+    if not args.mongo_url:
+        # GridFS needs a real server
+        os.environ["PDF_STORAGE"] = "local"
+        os.environ["PDF_STORAGE_PATH"] = storage_dir
+    if args.workers:
+        os.environ["PDF_WORKERS"] = str(args.workers)
+
+
+def create_bench_app(server, args):
+    """The app on mongomock, or on the mongod from ``--mongo-url``; returns it with its client."""
+    if args.mongo_url:
+        from settings import create_mongo_client
+
+        client = create_mongo_client(args.mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        client = AsyncMongoMockClient()
+    return server.create_app(mongo_client=client), client
+
+
+def use_primary_reads(server):
+    # mongomock_motor's with_options() returns a synchronous collection; call once the app has started
+    server.orders_read = server.db.orders
+    server.list_reads_cacheable = True
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    response = await coro
+    return response, time.perf_counter() - start
+
+
+async def bench_upload(http, args) -> dict:
+    corpus = list(generate_corpus(args.uploads, args.min_pages, args.max_pages, seed=args.seed))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, statuses = [], {}
+
+    async def upload(filename, data):
+        async with semaphore:
+            response, elapsed = await timed(
+                http.post("/api/upload-pdf", files={"file": (filename, data, "application/pdf")})
+            )
+        latencies.append(elapsed)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(filename, data) for filename, data, _ in corpus))
+    wall = time.perf_counter() - start
+
+    total_bytes = sum(len(data) for _, data, _ in corpus)
+    return {
+        "files": len(corpus),
+        "concurrency": args.concurrency,
+        "pages": sum(expected["page_count"] for _, _, expected in corpus),
+        "bytes": total_bytes,
+        "wall_s": round(wall, 3),
+        "files_per_s": round(len(corpus) / wall, 2),
+        "mb_per_s": round(total_bytes / wall / (1024 * 1024), 3),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "latency": summarize(latencies),
+    }
+
+
+async def seed_orders(server, target: int, seed: int, batch_size: int = 5000) -> float:
+    # Grows the collection to ``target`` synthetic orders, keeping what an earlier size inserted
+    existing = await server.db.orders.count_documents({"pdf_file_id": None})
+    start = time.perf_counter()
+    batch = []
+    for index, order in enumerate(synthetic_orders(target, seed=seed)):
+        if index < existing:
+            continue
+        batch.append(order)
+        if len(batch) >= batch_size:
+            await server.db.orders.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await server.db.orders.insert_many(batch, ordered=False)
+    await server.orders_version.bump()
+    await server.suggest_version.bump()
+    return time.perf_counter() - start
+
+
+async def bench_search(http, server, args, text_search: bool) -> dict:
+    results = {}
+    for size in args.orders:
+        seed_s = await seed_orders(server, size, args.seed)
+        by_type = {}
+        for search_type, term in SEARCHES:
+            name = f"{search_type}:{term}"
+            if search_type in TEXT_SEARCH_TYPES and not text_search:
+                by_type[name] = {"skipped": "no $text support in mongomock"}
+                continue
+            latencies, hits, errors = [], 0, 0
+            for _ in range(args.repeat):
+                response, elapsed = await timed(
+                    http.post("/api/search-orders", json={"search_term": term, "search_type": search_type})
+                )
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                hits = response.json()["count"]
+            by_type[name] = {"hits": hits, "errors": errors, "latency": summarize(latencies)}
+        results[str(size)] = {"seed_s": round(seed_s, 3), "queries": by_type}
+    return results
+
+
+async def bench_list(http, args) -> dict:
+    results = {}
+    for fields in ("", "snippet"):
+        first_page, walk = [], []
+        for _ in range(args.repeat):
+            response, elapsed = await timed(http.get("/api/orders", params={"fields": fields} if fields else None))
+            first_page.append(elapsed)
+        cursor, pages = None, 0
+        while pages < args.list_pages:
+            params = {"limit": 100}
+            if fields:
+                params["fields"] = fields
+            if cursor:
+                params["cursor"] = cursor
+            response, elapsed = await timed(http.get("/api/orders", params=params))
+            walk.append(elapsed)
+            pages += 1
+            cursor = response.json().get("next_cursor")
+            if not cursor:
+                break
+        results[fields or "summary"] = {
+            "first_page": summarize(first_page),
+            "pages_walked": pages,
+            "walk": summarize(walk),
+        }
+    return results
+
+
+async def run(args) -> dict:
+    import httpx
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as storage_dir:
+        configure_env(args, storage_dir)
+        import server
+        from cache import create_cache_backend
+
+        app, client = create_bench_app(server, args)
+        if args.mongo_url:
+            await client.drop_database(args.db_name)
+        if not args.response_cache:
+            server.response_cache = create_cache_backend(None, maxsize=0)
+
+        results = {}
+        async with app.router.lifespan_context(app):
+            if not args.mongo_url:
+                use_primary_reads(server)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as http:
+                if "upload" in args.scenarios:
+                    results["upload"] = await bench_upload(http, args)
+                if "search" in args.scenarios:
+                    results["search"] = await bench_search(http, server, args, text_search=bool(args.mongo_url))
+                if "list" in args.scenarios:
+                    if "search" not in args.scenarios:
+                        await seed_orders(server, args.orders[0], args.seed)
+                    results["list"] = await bench_list(http, args)
+        if args.mongo_url and not args.keep:
+            await client.drop_database(args.db_name)
+        client.close()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "mongod" if args.mongo_url else "mongomock",
+            "response_cache": args.response_cache,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "mongo_url")},
+        },
+        "results": results,
+    }
+
+
+def flatten_ms(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten_ms(value, path))
+        elif key.endswith("_ms"):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    now = flatten_ms(current["results"])
+    before = flatten_ms(baseline["results"])
+    regressions = []
+    for path, value in sorted(now.items()):
+        old = before.get(path)
+        # Ignore sub-millisecond noise, it is dominated by the event loop
+        if old and value > 1 and value > old * (1 + threshold):
+            regressions.append({"metric": path, "baseline": old, "current": value, "ratio": round(value / old, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order API offline")
+    parser.add_argument("--scenarios", default="upload,search,list")
+    parser.add_argument("--orders", default="10000", help="comma-separated collection sizes for search")
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes")
+    parser.add_argument("--repeat", type=int, default=20, help="requests per search query and list page")
+    parser.add_argument("--list-pages", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=None, help="local mongod instead of mongomock")
+    parser.add_argument("--db-name", default="stoneapp_bench")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database afterwards")
+    parser.add_argument("--response-cache", action="store_true")
+    parser.add_argument("--out", default=None, help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", default=None, help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    args.orders = sorted(int(n) for n in args.orders.split(","))
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        report["regressions"] = compare(report, baseline, args.threshold)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"slower: {regression['metric']} {regression['baseline']} -> {regression['current']} ms",
+                  file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Storage and bandwidth saved by text and response compression.
+
+Uploads a synthetic PDF corpus through the API in-process (mongomock by
+default, a local mongod with ``--mongo-url``), then reports:
+
+* ``storage``: BSON size of order documents and page rows as stored, against
+  the same documents with the text kept as plain strings, plus the raw text
+  under each available codec.
+* ``bandwidth``: bytes on the wire for the main read endpoints with
+  ``Accept-Encoding`` identity, gzip and (if installed) brotli.
+
+Run from the backend directory:
+
+    python benchmarks/bench_compression.py [--uploads 50] [--min-pages 1] [--max-pages 20] [--out report.json]
+
+The sizes are those of the documents, not of the files on disk: WiredTiger
+compresses its blocks as well (snappy by default), so the disk saving is
+smaller than the one in the cache and on the wire.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_api import configure_env, create_bench_app, git_commit, use_primary_reads  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+
+ENDPOINTS = [
+    ("list", "/api/orders?limit=100"),
+    ("list_snippets", "/api/orders?limit=100&fields=snippet"),
+    ("export_text", "/api/orders/export?fields=extracted_text"),
+    ("changes", "/api/orders/changes?limit=500"),
+    ("stats", "/api/stats"),
+]
+
+
+def ratio(before: int, after: int) -> float:
+    return round(after / before, 3) if before else 0.0
+
+
+def storage_report(orders: list, pages: list) -> dict:
+    import bson
+    from textstore import page_text, pop_text, zstandard
+
+    stored = plain = 0
+    texts = []
+    for order in orders:
+        stored += len(bson.encode(order))
+        order = dict(order)
+        order["extracted_text"] = pop_text(order)
+        texts.append(order["extracted_text"])
+        plain += len(bson.encode(order))
+
+    stored_pages = plain_pages = 0
+    for page in pages:
+        stored_pages += len(bson.encode(page))
+        page = dict(page)
+        page["text"] = page_text(page)
+        plain_pages += len(bson.encode(page))
+
+    raw = [text.encode("utf-8") for text in texts]
+    codecs = {"deflate": sum(len(zlib.compress(data, 6)) for data in raw)}
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3)
+        codecs["zstd"] = sum(len(compressor.compress(data)) for data in raw)
+    text_bytes = sum(len(data) for data in raw)
+
+    return {
+        "orders": {"count": len(orders), "plain_bytes": plain, "stored_bytes": stored, "ratio": ratio(plain, stored)},
+        "pages": {
+            "count": len(pages), "plain_bytes": plain_pages, "stored_bytes": stored_pages,
+            "ratio": ratio(plain_pages, stored_pages),
+        },
+        "text": {
+            "bytes": text_bytes,
+            "codecs": {name: {"bytes": size, "ratio": ratio(text_bytes, size)} for name, size in codecs.items()},
+        },
+    }
+
+
+async def fetch_size(http, path: str, encoding: str) -> int:
+    response = await http.get(path, headers={"Accept-Encoding": encoding})
+    response.raise_for_status()
+    # Bytes as received, before httpx decodes them
+    return response.num_bytes_downloaded
+
+
+async def bandwidth_report(http, order_ids: list) -> dict:
+    from compression import brotli
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    report = {}
+    for name, path in ENDPOINTS:
+        report[name] = {encoding: await fetch_size(http, path, encoding) for encoding in encodings}
+    for name, template in (("detail", "/api/order/{}"), ("pages", "/api/order/{}/pages")):
+        report[name] = {
+            encoding: sum([await fetch_size(http, template.format(order_id), encoding) for order_id in order_ids])
+            for encoding in encodings
+        }
+    for sizes in report.values():
+        sizes.update({f"{encoding}_ratio": ratio(sizes["identity"], sizes[encoding]) for encoding in encodings[1:]})
+    return report
+
+
+async def run(args) -> dict:
+    import httpx
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as storage_dir:
+        configure_env(args, storage_dir)
+        # Full text at upload, so the stored orders look like they do once the index jobs ran
+        os.environ["PDF_EXTRACTION_MODE"] = "full"
+        import server
+        from cache import create_cache_backend
+
+        # One log line per request would bury the report
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        app, client = create_bench_app(server, args)
+        if args.mongo_url:
+            await client.drop_database(args.db_name)
+        server.response_cache = create_cache_backend(None, maxsize=0)
+
+        async with app.router.lifespan_context(app):
+            if not args.mongo_url:
+                use_primary_reads(server)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as http:
+                for filename, data, _ in generate_corpus(args.uploads, args.min_pages, args.max_pages, seed=args.seed):
+                    response = await http.post("/api/upload-pdf", files={"file": (filename, data, "application/pdf")})
+                    response.raise_for_status()
+                orders = await server.db.orders.find({}, projection={"_id": 0}).to_list(None)
+                pages = await server.db.order_pages.find({}, projection={"_id": 0}).to_list(None)
+                results = {
+                    "storage": storage_report(orders, pages),
+                    "bandwidth": await bandwidth_report(http, [order["id"] for order in orders]),
+                }
+        if args.mongo_url and not args.keep:
+            await client.drop_database(args.db_name)
+        client.close()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "database": "mongod" if args.mongo_url else "mongomock",
+            "minimum_size": app.state.settings.compression_min_size,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "mongo_url")},
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure storage and bandwidth saved by compression")
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=None, help="local mongod instead of mongomock")
+    parser.add_argument("--db-name", default="stoneapp_bench")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database afterwards")
+    parser.add_argument("--out", default=None, help="write the report JSON here instead of stdout")
+    args = parser.parse_args()
+
+    output = json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Micro-benchmark and accuracy check for the field extraction engine.
+
+Run from the backend directory:
+
+    python benchmarks/bench_extraction.py [--iterations 2000] [--config extraction_fields.json] [--json]
+
+The sample corpus is repeated with filler text appended so the header-region
+restriction and long documents are exercised as well.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from field_extraction import ExtractionEngine, DEFAULT_CONFIG_PATH, NOT_RECOGNIZED  # noqa: E402
+
+SAMPLES_PATH = Path(__file__).parent / "extraction_samples.json"
+FILLER = "Pos. {i} Grabeinfassung, poliert, inkl. Montage und Fundament 1.250,00 EUR\n"
+
+
+def load_corpus(pages: int):
+    samples = json.loads(SAMPLES_PATH.read_text(encoding="utf-8"))
+    filler = "".join(FILLER.format(i=i) for i in range(pages * 40))
+    return [(sample["text"] + filler, sample["expected"]) for sample in samples]
+
+
+def run(engine: ExtractionEngine, corpus, iterations: int) -> dict:
+    correct = total = 0
+    for text, expected in corpus:
+        fields = engine.extract(text)
+        for name, value in expected.items():
+            found = (fields.get(name) or {}).get("value") or NOT_RECOGNIZED
+            correct += found == value
+            total += 1
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for text, _ in corpus:
+            engine.extract(text)
+        timings.append((time.perf_counter() - start) / len(corpus))
+
+    return {
+        "documents": len(corpus),
+        "iterations": iterations,
+        "accuracy": round(correct / total, 4),
+        "mean_us": round(statistics.mean(timings) * 1e6, 2),
+        "p95_us": round(sorted(timings)[int(len(timings) * 0.95) - 1] * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order field extraction")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG_PATH))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = ExtractionEngine.from_file(args.config)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    results = {"compile_ms": round(compile_ms, 3)}
+    for pages in (0, 1, 10):
+        results[f"{pages}_filler_pages"] = run(engine, load_corpus(pages), args.iterations // (pages + 1) or 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"compile: {results['compile_ms']} ms")
+    for name, result in results.items():
+        if name != "compile_ms":
+            print(f"{name:>18}: {result['mean_us']:>9} µs/doc (p95 {result['p95_us']} µs), accuracy {result['accuracy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Import-time budget for the API module.
+
+Imports ``server`` in fresh interpreters under ``python -X importtime`` and
+reports the median import time with the heaviest direct imports. Run from
+the backend directory:
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 750] [--out startup.json]
+
+Exits with status 1 when the median exceeds ``--budget-ms`` or when one of
+``FORBIDDEN_MODULES`` is imported at startup: the PDF libraries belong to the
+extraction, preview and OCR paths and are imported there on first use. The
+budget is machine-dependent; the forbidden modules check is not.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_api import git_commit  # noqa: E402
+
+FORBIDDEN_MODULES = ("pdfplumber", "pdfminer", "pypdfium2", "PIL", "pytesseract", "reportlab")
+
+
+def parse_importtime(stderr: str) -> list:
+    """``(depth, module, self_us, cumulative_us)`` per line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_once(module: str) -> list:
+    env = dict(os.environ)
+    # server reads these at import; nothing connects until the app starts
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "stoneapp_startup")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        rows = import_once(module)
+        total = next(cumulative for depth, name, _, cumulative in rows if depth == 0 and name == module)
+        samples.append((total, rows))
+    samples.sort(key=lambda sample: sample[0])
+    median_total, rows = samples[len(samples) // 2]
+
+    # Imports made by the module itself, each with everything it pulled in
+    direct = sorted(
+        ((name, cumulative) for depth, name, _, cumulative in rows if depth == 1),
+        key=lambda item: item[1], reverse=True,
+    )
+    imported = {name for _, name, _, _ in rows}
+    return {
+        "runs_ms": [round(total / 1000, 1) for total, _ in samples],
+        "median_ms": round(median_total / 1000, 1),
+        "mean_ms": round(statistics.mean(total for total, _ in samples) / 1000, 1),
+        "modules": len(imported),
+        "heaviest": [{"module": name, "ms": round(us / 1000, 1)} for name, us in direct[:top]],
+        "forbidden": sorted(imported & set(FORBIDDEN_MODULES)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the API module against a budget")
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=750)
+    parser.add_argument("--top", type=int, default=10, help="heaviest direct imports to list")
+    parser.add_argument("--out", default=None, help="write results JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = measure(args.module, args.runs, args.top)
+    report = {
+        "meta": {"commit": git_commit(), "python": sys.version.split()[0], "budget_ms": args.budget_ms},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    failures = []
+    if results["median_ms"] > args.budget_ms:
+        failures.append(f"import {args.module} took {results['median_ms']} ms, budget {args.budget_ms} ms")
+    if results["forbidden"]:
+        failures.append(f"imported at startup: {', '.join(results['forbidden'])}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Synthetic order corpus for the API benchmarks.
+
+Generates workshop-style order PDFs (1-100 pages, several header layouts)
+with reportlab, and plain order documents for seeding large collections
+without going through the upload path. Everything is derived from a seed,
+so two runs produce byte-identical input.
+
+Write a corpus to disk to inspect it:
+
+    python benchmarks/corpus.py --out /tmp/corpus --count 20 [--min-pages 1] [--max-pages 100]
+"""
+import argparse
+import hashlib
+import io
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+FIRST_NAMES = ["Max", "Anna", "Jürgen", "Sabine", "Klaus", "Petra", "Günther", "Ursula", "Stefan", "Monika"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schäfer", "Koch"]
+STONE_TYPES = ["Granit", "Marmor", "Kalkstein", "Sandstein", "Schiefer", "Basalt", "Travertin"]
+ITEMS = [
+    "Grabeinfassung, poliert", "Grabplatte mit Inschrift", "Fensterbank innen", "Küchenarbeitsplatte",
+    "Treppenstufe mit Setzstufe", "Sockelleiste", "Urnengrabstein", "Waschtischplatte",
+]
+LAYOUTS = ("labels", "dash", "table", "late_header")
+
+
+def order_fields(index: int, rng: random.Random) -> dict:
+    return {
+        "order_number": f"A-{2020 + index % 6}-{index:06d}",
+        "customer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "stone_type": rng.choice(STONE_TYPES),
+    }
+
+
+def filler_lines(rng: random.Random, count: int) -> List[str]:
+    return [
+        f"Pos. {i + 1} {rng.choice(ITEMS)} {rng.randint(1, 40) * 25},00 EUR"
+        for i in range(count)
+    ]
+
+
+def make_order_pdf(index: int, pages: int, layout: str, rng: random.Random) -> Tuple[bytes, dict]:
+    """One order PDF and the field values the extraction should find in it."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    fields = order_fields(index, rng)
+    header = {
+        "labels": [
+            f"Auftragsnummer: {fields['order_number']}",
+            f"Kunde: {fields['customer_name']}",
+            f"Steinart: {fields['stone_type']}",
+        ],
+        "dash": [
+            f"Auftrag - {fields['order_number']}",
+            f"Auftraggeber - {fields['customer_name']}",
+            f"Material - {fields['stone_type']}",
+        ],
+    }
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    header_page = pages if layout == "late_header" else 1
+    for page in range(1, pages + 1):
+        y = 800
+        pdf.setFont("Helvetica-Bold", 14)
+        pdf.drawString(60, y, "Natursteinwerk Beispiel GmbH")
+        pdf.setFont("Helvetica", 10)
+        y -= 30
+        if page == header_page:
+            if layout == "table":
+                for label, value in (("Auftragsnr.", fields["order_number"]), ("Kunde", fields["customer_name"]),
+                                     ("Steinart", fields["stone_type"])):
+                    pdf.drawString(60, y, f"{label}:")
+                    pdf.drawString(200, y, value)
+                    y -= 16
+            else:
+                for line in header.get(layout, header["labels"]):
+                    pdf.drawString(60, y, line)
+                    y -= 16
+            y -= 10
+        for line in filler_lines(rng, 35 if page != header_page else 30):
+            pdf.drawString(60, y, line)
+            y -= 14
+        pdf.drawString(500, 30, f"Seite {page}/{pages}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue(), fields
+
+
+def page_counts(count: int, min_pages: int, max_pages: int, rng: random.Random) -> List[int]:
+    # Most orders are short; a long tail of multi-page offers up to max_pages
+    counts = []
+    for _ in range(count):
+        pages = int(rng.paretovariate(1.2))
+        counts.append(max(min_pages, min(max_pages, pages)))
+    return counts
+
+
+def generate_corpus(
+    count: int, min_pages: int = 1, max_pages: int = 100, seed: int = 42, offset: int = 0,
+) -> Iterator[Tuple[str, bytes, dict]]:
+    """Yields ``(filename, pdf_bytes, expected)``; expected holds the field values and ``page_count``."""
+    rng = random.Random(seed)
+    for n, pages in enumerate(page_counts(count, min_pages, max_pages, rng)):
+        index = offset + n
+        layout = LAYOUTS[index % len(LAYOUTS)]
+        data, fields = make_order_pdf(index, pages, layout, rng)
+        yield f"auftrag-{index:06d}-{layout}-{pages}p.pdf", data, dict(fields, page_count=pages)
+
+
+def synthetic_orders(count: int, seed: int = 42, start: datetime = None) -> Iterator[dict]:
+    """Order documents in the stored shape, for seeding search and list benchmarks."""
+    from textstore import text_fields
+
+    rng = random.Random(seed)
+    start = start or datetime(2024, 1, 1)
+    for index in range(count):
+        fields = order_fields(index, rng)
+        text = "\n".join(
+            [f"Auftragsnummer: {fields['order_number']}", f"Kunde: {fields['customer_name']}",
+             f"Steinart: {fields['stone_type']}"] + filler_lines(rng, 8)
+        )
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            **fields,
+            "order_number_key": fields["order_number"].upper(),
+            "pdf_content": None,
+            "pdf_file_id": None,
+            "pdf_size": None,
+            "pdf_sha256": hashlib.sha256(f"{seed}:{index}".encode()).hexdigest(),
+            **text_fields(text),
+            "page_count": 1,
+            "text_complete": True,
+            "status": "indexed",
+            "extra_fields": {},
+            "extraction_confidence": {},
+            "upload_date": start + timedelta(minutes=index),
+            "updated_at": start + timedelta(minutes=index),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic order PDF corpus")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for filename, data, _ in generate_corpus(args.count, args.min_pages, args.max_pages, args.seed):
+        (out / filename).write_bytes(data)
+    print(f"{args.count} PDFs written to {out}")
+
+
+if __name__ == "__main__":
+    main()
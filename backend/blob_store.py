@@ -0,0 +1,189 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobNotFoundError(Exception):
+    """Raised when a blob id does not resolve to stored content."""
+
+
+class BlobStore:
+    """Minimal interface for storing PDF binaries outside the order documents."""
+
+    async def put(self, data: bytes, filename: str, metadata: dict = None) -> str:
+        raise NotImplementedError
+
+    async def put_file(self, path: str, filename: str, metadata: dict = None) -> str:
+        """Store a file from disk without loading it into memory."""
+        raise NotImplementedError
+
+    async def size(self, blob_id: str) -> int:
+        raise NotImplementedError
+
+    def iter_range(self, blob_id: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+        """Async generator yielding the bytes in ``[start, end]`` (inclusive) in chunks."""
+        raise NotImplementedError
+
+    async def read(self, blob_id: str) -> bytes:
+        length = await self.size(blob_id)
+        if length == 0:
+            return b""
+        return b"".join([chunk async for chunk in self.iter_range(blob_id, 0, length - 1)])
+
+    async def download_to_file(self, blob_id: str, path: str):
+        with open(path, "wb") as target:
+            length = await self.size(blob_id)
+            if length:
+                async for chunk in self.iter_range(blob_id, 0, length - 1):
+                    await asyncio.to_thread(target.write, chunk)
+
+    async def delete(self, blob_id: str):
+        raise NotImplementedError
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db, bucket_name: str = "pdfs"):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+    @staticmethod
+    def _object_id(blob_id: str) -> ObjectId:
+        try:
+            return ObjectId(blob_id)
+        except (InvalidId, TypeError):
+            raise BlobNotFoundError(blob_id)
+
+    async def _open(self, blob_id: str):
+        try:
+            return await self.bucket.open_download_stream(self._object_id(blob_id))
+        except NoFile:
+            raise BlobNotFoundError(blob_id)
+
+    async def put(self, data: bytes, filename: str, metadata: dict = None) -> str:
+        file_id = await self.bucket.upload_from_stream(filename, data, metadata=metadata or {})
+        return str(file_id)
+
+    async def put_file(self, path: str, filename: str, metadata: dict = None) -> str:
+        # Motor runs the GridFS upload in its executor, which reads the file chunk by chunk
+        with open(path, "rb") as source:
+            file_id = await self.bucket.upload_from_stream(filename, source, metadata=metadata or {})
+        return str(file_id)
+
+    async def size(self, blob_id: str) -> int:
+        grid_out = await self._open(blob_id)
+        return grid_out.length
+
+    async def iter_range(self, blob_id: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+        grid_out = await self._open(blob_id)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def delete(self, blob_id: str):
+        try:
+            await self.bucket.delete(self._object_id(blob_id))
+        except NoFile:
+            pass
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, blob_id: str) -> Path:
+        # Blob ids are generated by put(); reject anything that could escape the root
+        if not blob_id or not all(c in "0123456789abcdef" for c in blob_id):
+            raise BlobNotFoundError(blob_id)
+        return self.root / blob_id[:2] / blob_id
+
+    def _write(self, blob_id: str, data: bytes):
+        path = self._path(blob_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _copy(self, blob_id: str, source_path: str):
+        path = self._path(blob_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read_chunk(self, path: Path, offset: int, length: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    async def put(self, data: bytes, filename: str, metadata: dict = None) -> str:
+        blob_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._write, blob_id, data)
+        return blob_id
+
+    async def put_file(self, path: str, filename: str, metadata: dict = None) -> str:
+        blob_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._copy, blob_id, path)
+        return blob_id
+
+    async def size(self, blob_id: str) -> int:
+        try:
+            return (await asyncio.to_thread(self._path(blob_id).stat)).st_size
+        except FileNotFoundError:
+            raise BlobNotFoundError(blob_id)
+
+    async def iter_range(self, blob_id: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+        path = self._path(blob_id)
+        offset = start
+        while offset <= end:
+            try:
+                chunk = await asyncio.to_thread(self._read_chunk, path, offset, min(chunk_size, end - offset + 1))
+            except FileNotFoundError:
+                raise BlobNotFoundError(blob_id)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    async def delete(self, blob_id: str):
+        try:
+            await asyncio.to_thread(self._path(blob_id).unlink)
+        except FileNotFoundError:
+            pass
+
+
+async def copy_blob(source: BlobStore, target: BlobStore, blob_id: str, filename: str, metadata: dict = None,
+                    tmp_dir: str = None) -> str:
+    """Copy one blob between stores through a temp file; returns the id in ``target``."""
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, prefix="blob-", suffix=".pdf")
+    os.close(fd)
+    try:
+        await source.download_to_file(blob_id, tmp_path)
+        return await target.put_file(tmp_path, filename, metadata=metadata)
+    finally:
+        os.unlink(tmp_path)
+
+
+def create_blob_store(
+    db, prefix: str = "PDF", default_name: str = "pdf_storage", default_bucket: str = "pdfs",
+) -> BlobStore:
+    # PDF_STORAGE, PDF_STORAGE_PATH and PDF_GRIDFS_BUCKET; other prefixes configure further stores
+    backend = os.environ.get(f"{prefix}_STORAGE", "gridfs").lower()
+    if backend == "local":
+        return LocalBlobStore(os.environ.get(f"{prefix}_STORAGE_PATH", str(Path(__file__).parent / default_name)))
+    if backend == "gridfs":
+        return GridFSBlobStore(db, bucket_name=os.environ.get(f"{prefix}_GRIDFS_BUCKET", default_bucket))
+    raise ValueError(f"Unknown {prefix}_STORAGE backend: {backend}")
@@ -0,0 +1,128 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+class LRUCache:
+    """Small in-process LRU cache with an optional per-entry time to live.
+
+    Not thread-safe; it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or (self.ttl is not None and entry[1] < time.monotonic()):
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+
+class MemoryCacheBackend:
+    """Async facade over LRUCache so it can be swapped for a shared backend."""
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.cache = LRUCache(maxsize, ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self.cache.set(key, value)
+
+
+class RedisCacheBackend:
+    """Shared cache for several API workers; needs the optional ``redis`` package."""
+
+    def __init__(self, url: str, ttl: float = None, prefix: str = "stoneapp:"):
+        import redis.asyncio
+
+        self.redis = redis.asyncio.from_url(url)
+        self.ttl = int(ttl) if ttl else None
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes):
+        await self.redis.set(self.prefix + key, value, ex=self.ttl)
+
+
+def create_cache_backend(url: Optional[str], maxsize: int, ttl: float = None):
+    if url:
+        return RedisCacheBackend(url, ttl)
+    return MemoryCacheBackend(maxsize, ttl)
+
+
+class CollectionVersion:
+    """Version counter that is bumped on every write to a collection.
+
+    Cached responses embed the version in their key, so a bump invalidates all
+    of them at once. The counter lives in MongoDB so every API worker sees
+    writes made by the others; reads are memoised for ``ttl`` seconds.
+    """
+
+    def __init__(self, collection, name: str, ttl: float = 1.0):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self._value = None
+        self._fetched_at = 0.0
+
+    async def get(self) -> int:
+        if self._value is None or time.monotonic() - self._fetched_at > self.ttl:
+            doc = await self.collection.find_one({"_id": self.name})
+            self._value = doc["version"] if doc else 0
+            self._fetched_at = time.monotonic()
+        return self._value
+
+    async def bump(self) -> int:
+        doc = await self.collection.find_one_and_update(
+            {"_id": self.name},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._value = doc["version"]
+        self._fetched_at = time.monotonic()
+        return self._value
+
+
+def pack_response(etag: str, body: bytes) -> bytes:
+    return etag.encode() + b"\n" + body
+
+
+def unpack_response(value: bytes) -> Tuple[str, bytes]:
+    etag, _, body = value.partition(b"\n")
+    return etag.decode(), body
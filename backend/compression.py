@@ -0,0 +1,172 @@
+"""Negotiated response compression (brotli or gzip) as pure ASGI middleware.
+
+Starlette's GZipMiddleware only speaks gzip; this one prefers brotli when the
+client accepts it and the ``brotli`` package is installed. Bodies below
+``minimum_size`` and types that are already compressed (PDFs, images) pass
+through untouched, as do range and 304 responses.
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:  # gzip only
+        brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript")
+GZIP_LEVEL = 6
+# Quality 4 compresses JSON about as well as gzip -9 at a fraction of the CPU of the default 11
+BROTLI_QUALITY = 4
+
+
+def parse_accept_encoding(header: str) -> dict:
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    return weights
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    weights = parse_accept_encoding(header)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip container
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Flushed per chunk so streamed responses keep arriving incrementally
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = _header(scope.get("headers") or [], b"accept-encoding") or b""
+        encoding = choose_encoding(accept.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    """Holds back the response start until the first body message shows whether to compress.
+
+    A body sent in one message is compressed only from ``minimum_size`` on.
+    Streamed bodies (exports, NDJSON) are compressed from the first chunk and
+    flushed per chunk, so nothing is held back waiting for more bytes.
+    """
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.eligible = False
+        self.compressor = None
+
+    def _is_eligible(self, message) -> bool:
+        if message["status"] in (204, 206, 304):
+            return False
+        headers = message.get("headers", [])
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_start(self, compressed: bool, length: Optional[int]):
+        headers = [
+            (key, value) for key, value in self.start.get("headers", [])
+            if key.lower() not in (b"content-length", b"vary", b"etag")
+        ]
+        original = self.start.get("headers", [])
+        vary = _header(original, b"vary")
+        etag = _header(original, b"etag")
+        if compressed:
+            headers.append((b"content-encoding", self.encoding.encode()))
+            vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+            # The compressed bytes differ from what the strong ETag was computed over
+            if etag and not etag.startswith(b"W/"):
+                etag = b"W/" + etag
+        if vary:
+            headers.append((b"vary", vary))
+        if etag:
+            headers.append((b"etag", etag))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        await self.send(dict(self.start, headers=headers))
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.eligible = self._is_eligible(message)
+            if not self.eligible:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or not self.eligible:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body:
+                # The whole body in one message: small ones are not worth the headers
+                if len(body) < self.minimum_size:
+                    await self._send_start(False, len(body))
+                    await self.send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _Compressor(self.encoding)
+                payload = compressor.compress(body) + compressor.finish()
+                await self._send_start(True, len(payload))
+                await self.send({"type": "http.response.body", "body": payload})
+                return
+            self.compressor = _Compressor(self.encoding)
+            await self._send_start(True, None)
+
+        payload = self.compressor.compress(body) if body else b""
+        if not more_body:
+            payload += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": payload, "more_body": more_body})
@@ -0,0 +1,95 @@
+import importlib.util
+import io
+import logging
+import os
+from typing import List, Optional, Tuple, Union
+
+from field_extraction import get_engine, NOT_RECOGNIZED
+
+# These helpers run inside the extraction process pool, so they must stay
+# importable without pulling in the FastAPI app or the database client.
+# pdfplumber and pypdfium2 are imported on first use, in the pool workers:
+# the API process itself never parses a PDF and should not pay for them at boot.
+
+# Optional fast backend; find_spec only checks it is installed, without importing it
+PDFIUM_AVAILABLE = importlib.util.find_spec("pypdfium2") is not None
+
+EXTRACTION_MODES = ("header", "full", "fast")
+
+def _open_source(pdf_content):
+    return io.BytesIO(pdf_content) if isinstance(pdf_content, bytes) else pdf_content
+
+def _pdfplumber_pages(pdf_content, max_pages: Optional[int]) -> Tuple[List[str], int]:
+    import pdfplumber
+
+    with pdfplumber.open(_open_source(pdf_content)) as pdf:
+        pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+        return [page.extract_text() or "" for page in pages], len(pdf.pages)
+
+def _pdfium_pages(pdf_content, max_pages: Optional[int]) -> Tuple[List[str], int]:
+    # pdfium is much faster than pdfplumber but ignores layout; good enough for search text
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_content if isinstance(pdf_content, bytes) else str(pdf_content))
+    try:
+        page_count = len(pdf)
+        texts = []
+        for index in range(page_count if max_pages is None else min(max_pages, page_count)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n").strip())
+            textpage.close()
+            page.close()
+        return texts, page_count
+    finally:
+        pdf.close()
+
+# Helper function to extract the text of each page, given the PDF bytes or a path to the file
+def extract_pages_from_pdf(
+    pdf_content: Union[bytes, str, os.PathLike], mode: str = "full", header_pages: int = 1
+) -> dict:
+    """Extract per-page text.
+
+    ``header`` reads only the first ``header_pages`` pages (enough for field
+    detection), ``full`` reads every page with pdfplumber and ``fast`` uses
+    pdfium when it is installed, falling back to pdfplumber.
+    """
+    max_pages = header_pages if mode == "header" else None
+    try:
+        if mode == "fast" and PDFIUM_AVAILABLE:
+            try:
+                pages, page_count = _pdfium_pages(pdf_content, max_pages)
+            except Exception as e:
+                logging.warning(f"Fast text extraction failed, falling back to pdfplumber: {e}")
+                pages, page_count = _pdfplumber_pages(pdf_content, max_pages)
+        else:
+            pages, page_count = _pdfplumber_pages(pdf_content, max_pages)
+    except Exception as e:
+        logging.error(f"Error extracting text from PDF: {e}")
+        return {"pages": [], "page_count": 0, "complete": True}
+    return {"pages": pages, "page_count": page_count, "complete": len(pages) == page_count}
+
+def join_pages(pages: List[str]) -> str:
+    return "".join(page + "\n" for page in pages if page)
+
+# Helper function to extract text from PDF, given its bytes or a path to the file
+def extract_text_from_pdf(pdf_content: Union[bytes, str, os.PathLike], mode: str = "full") -> str:
+    return join_pages(extract_pages_from_pdf(pdf_content, mode)["pages"])
+
+# Helper function to extract structured data from text
+def extract_order_info(text: str):
+    # Fields and their patterns are configured in extraction_fields.json (or EXTRACTION_CONFIG)
+    engine = get_engine()
+    fields = engine.extract(text)
+    
+    info = {
+        name: (fields.get(name) or {}).get("value") or NOT_RECOGNIZED
+        for name in ("order_number", "customer_name", "stone_type")
+    }
+    info["extra_fields"] = {
+        name: result["value"]
+        for name, result in fields.items()
+        if name not in info and result is not None
+    }
+    info["confidence"] = {name: result["confidence"] if result else 0.0 for name, result in fields.items()}
+    return info
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+NOT_RECOGNIZED = "Nicht erkannt"
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "extraction_fields.json"
+
+# Label and value are separated by a colon, dash or whitespace ("Kunde: ...", "Auftrag - ...")
+DEFAULT_SEPARATOR = r"[:\-\s]+"
+
+
+class FieldRule:
+    """One configured field, compiled into a single alternation over all of its labels."""
+
+    def __init__(self, config: dict):
+        self.name = config["name"]
+        labels = config.get("labels", [])
+        self.label_confidence = [label.get("confidence", 1.0) for label in labels]
+        flags = re.IGNORECASE if config.get("ignore_case", True) else 0
+
+        self.pattern = None
+        if labels:
+            alternatives = "|".join(f"(?P<l{i}>{label['pattern']})" for i, label in enumerate(labels))
+            separator = config.get("separator", DEFAULT_SEPARATOR)
+            self.pattern = re.compile(rf"\b(?:{alternatives}){separator}(?P<value>{config['value']})", flags)
+
+        keywords = config.get("keywords", [])
+        self.keyword_pattern = None
+        if keywords:
+            self.keyword_pattern = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b", flags)
+        self.keyword_confidence = config.get("keyword_confidence", 0.5)
+
+    def match(self, text: str) -> Optional[dict]:
+        # Earliest match of the highest-priority label wins, like trying the labels in order
+        best = None
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                label_index = self._label_index(match)
+                value = " ".join(match.group("value").split()).strip(" ,-")
+                if not value:
+                    continue
+                if best is None or label_index < best[0]:
+                    best = (label_index, value)
+                    if label_index == 0:
+                        break
+        if best is not None:
+            return {"value": best[1], "confidence": self.label_confidence[best[0]]}
+
+        if self.keyword_pattern is not None:
+            match = self.keyword_pattern.search(text)
+            if match:
+                return {"value": match.group(0), "confidence": self.keyword_confidence}
+        return None
+
+    @staticmethod
+    def _label_index(match: re.Match) -> int:
+        for name, value in match.groupdict().items():
+            if name != "value" and value is not None:
+                return int(name[1:])
+        return 0
+
+
+class ExtractionEngine:
+    """Extracts order fields from PDF text using patterns compiled once from a config file.
+
+    Matching is restricted to the header region (the first ``header_chars``
+    characters) first; matches found only further down the document get their
+    confidence scaled by ``outside_header_factor``.
+    """
+
+    def __init__(self, config: dict):
+        self.header_chars = config.get("header_chars", 2000)
+        self.outside_header_factor = config.get("outside_header_factor", 0.8)
+        self.rules = [FieldRule(field) for field in config["fields"]]
+
+    @classmethod
+    def from_file(cls, path) -> "ExtractionEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def field_names(self) -> List[str]:
+        return [rule.name for rule in self.rules]
+
+    def extract(self, text: str) -> Dict[str, Optional[dict]]:
+        header = text[:self.header_chars]
+        results = {}
+        for rule in self.rules:
+            result = rule.match(header)
+            if result is None and len(text) > self.header_chars:
+                result = rule.match(text)
+                if result is not None:
+                    result["confidence"] = round(result["confidence"] * self.outside_header_factor, 3)
+            results[rule.name] = result
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_engine(path: Optional[str] = None) -> ExtractionEngine:
+    return ExtractionEngine.from_file(path or os.environ.get("EXTRACTION_CONFIG") or DEFAULT_CONFIG_PATH)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Durable job queue stored in MongoDB, so no extra service is needed.
+
+    Jobs are claimed with a lease that the worker renews while the handler
+    runs; a job whose worker died becomes claimable again once the lease
+    expires. Failed jobs are retried with exponential
+    backoff and moved to the dead-letter collection after ``max_attempts``.
+    Handlers must therefore be idempotent.
+    """
+
+    def __init__(
+        self,
+        db,
+        collection: str = "jobs",
+        dead_letter_collection: str = "jobs_dead",
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.jobs = db[collection]
+        self.dead_letters = db[dead_letter_collection]
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+
+    async def enqueue(self, job_type: str, payload: dict, key: Optional[str] = None, delay: float = 0) -> bool:
+        """Queue a job; returns False if a job with the same key is already pending."""
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "run_at": now + timedelta(seconds=delay),
+            "created_at": now,
+        }
+        if key:
+            job["key"] = key
+        try:
+            await self.jobs.insert_one(job)
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    # The worker holding this job went away
+                    {"status": "running", "locked_until": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_by": worker_id,
+                    "locked_until": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def extend(self, job: dict):
+        """Push the lease of a running job forward, so it is not claimed again while it still runs."""
+        await self.jobs.update_one(
+            {"_id": job["_id"], "locked_by": job["locked_by"]},
+            {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+        )
+
+    async def complete(self, job: dict):
+        await self.jobs.delete_one({"_id": job["_id"], "locked_by": job["locked_by"]})
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.base_delay * 2 ** max(attempts - 1, 0), self.max_delay)
+
+    async def fail(self, job: dict, error: str):
+        if job["attempts"] >= self.max_attempts:
+            dead = {k: v for k, v in job.items() if k != "_id"}
+            dead.update(status="dead", last_error=error, failed_at=datetime.utcnow())
+            await self.dead_letters.insert_one(dead)
+            await self.jobs.delete_one({"_id": job["_id"]})
+            logger.error(f"Job {job['type']} {job['id']} moved to dead letters after {job['attempts']} attempts: {error}")
+            return
+        delay = self.backoff(job["attempts"])
+        await self.jobs.update_one(
+            {"_id": job["_id"], "locked_by": job["locked_by"]},
+            {
+                "$set": {
+                    "status": "queued",
+                    "run_at": datetime.utcnow() + timedelta(seconds=delay),
+                    "last_error": error,
+                },
+                "$unset": {"locked_by": "", "locked_until": ""},
+            },
+        )
+        logger.warning(f"Job {job['type']} {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {error}")
+
+    async def stats(self) -> dict:
+        counts = {}
+        async for row in self.jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        counts["dead"] = await self.dead_letters.count_documents({})
+        return counts
+
+
+class Worker:
+    """Polls a JobQueue and runs each job with the handler registered for its type."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[[dict], Awaitable[None]]],
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def run_job(self, job: dict):
+        handler = self.handlers.get(job["type"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job type {job['type']}")
+            lease = asyncio.create_task(self._renew_lease(job))
+            try:
+                await handler(job["payload"])
+            finally:
+                lease.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.queue.fail(job, f"{type(e).__name__}: {e}")
+        else:
+            await self.queue.complete(job)
+
+    async def _renew_lease(self, job: dict):
+        # Runs next to the handler: jobs such as a long OCR run may take longer than one lease
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                await self.queue.extend(job)
+            except Exception as e:
+                logger.warning(f"Could not extend the lease of job {job['type']} {job['id']}: {e}")
+
+    async def _loop(self, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                job = await self.queue.claim(self.worker_id)
+                if job is not None:
+                    await self.run_job(job)
+                    continue
+            except Exception:
+                # Claiming or recording a result failed, e.g. the database is unreachable. Back off
+                # and keep polling; a job left running is claimed again once its lease expires.
+                logger.exception("Worker loop iteration failed")
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, stop: asyncio.Event):
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        await asyncio.gather(*(self._loop(stop) for _ in range(self.concurrency)))
+        logger.info(f"Worker {self.worker_id} stopped")
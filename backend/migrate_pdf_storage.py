@@ -0,0 +1,85 @@
+"""One-shot migration moving inline base64 ``pdf_content`` into the blob store.
+
+Run from the backend directory:
+
+    python migrate_pdf_storage.py [--dry-run]
+
+Orders are processed one at a time and each one is committed on its own,
+so the script can be interrupted and re-run safely.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from blob_store import create_blob_store
+from settings import create_mongo_client
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(dry_run: bool = False) -> int:
+    client = create_mongo_client(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    blob_store = create_blob_store(db)
+
+    query = {"pdf_content": {"$type": "string"}, "pdf_file_id": None}
+    migrated = 0
+    try:
+        async for order in db.orders.find(query, projection={"id": 1, "pdf_content": 1}):
+            pdf_content = base64.b64decode(order["pdf_content"])
+            if dry_run:
+                logger.info(f"Would migrate order {order['id']} ({len(pdf_content)} bytes)")
+                migrated += 1
+                continue
+
+            pdf_sha256 = hashlib.sha256(pdf_content).hexdigest()
+            pdf_file_id = await blob_store.put(
+                pdf_content, f"{order['id']}.pdf", metadata={"sha256": pdf_sha256, "content_type": "application/pdf"}
+            )
+            try:
+                result = await db.orders.update_one(
+                    {"_id": order["_id"], "pdf_file_id": None},
+                    {
+                        "$set": {"pdf_file_id": pdf_file_id, "pdf_size": len(pdf_content), "pdf_sha256": pdf_sha256},
+                        "$unset": {"pdf_content": ""},
+                    },
+                )
+            except DuplicateKeyError:
+                # The same PDF is already stored on another order; leave this one for manual review
+                logger.warning(f"Order {order['id']} duplicates an existing PDF ({pdf_sha256}), skipped")
+                await blob_store.delete(pdf_file_id)
+                continue
+            if result.modified_count == 0:
+                # Someone else migrated this order in the meantime
+                await blob_store.delete(pdf_file_id)
+                continue
+            migrated += 1
+            logger.info(f"Migrated order {order['id']} ({len(pdf_content)} bytes)")
+    finally:
+        client.close()
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline PDF content into the blob store")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be migrated")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    migrated = asyncio.run(migrate(dry_run=args.dry_run))
+    logger.info(f"{'Would migrate' if args.dry_run else 'Migrated'} {migrated} orders")
+
+
+if __name__ == "__main__":
+    main()
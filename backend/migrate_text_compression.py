@@ -0,0 +1,95 @@
+"""Compress the extracted text of orders stored before text compression.
+
+Run from the backend directory:
+
+    python migrate_text_compression.py [--dry-run]
+
+Plain ``extracted_text`` on orders and archived orders becomes
+``extracted_text_z`` plus ``search_text``, plain page ``text`` becomes
+``text_z``. Every document is updated on its own and only if it still holds
+the plain text, so the script can be interrupted and re-run safely. The API
+reads both forms, it can keep running meanwhile. MongoDB only returns the
+freed space to the filesystem after a ``compact``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from settings import create_mongo_client
+from textstore import PAGE_TEXT_FIELD, compress_text, text_fields
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_orders(collection, dry_run: bool) -> int:
+    migrated = 0
+    query = {"extracted_text": {"$type": "string"}}
+    async for order in collection.find(query, projection={"extracted_text": 1}):
+        migrated += 1
+        if dry_run:
+            continue
+        await collection.update_one(
+            {"_id": order["_id"], "extracted_text": order["extracted_text"]},
+            {"$set": text_fields(order["extracted_text"]), "$unset": {"extracted_text": ""}},
+        )
+    return migrated
+
+
+async def migrate_pages(collection, dry_run: bool) -> int:
+    migrated = 0
+    async for page in collection.find({"text": {"$type": "string"}}, projection={"text": 1}):
+        migrated += 1
+        if dry_run:
+            continue
+        await collection.update_one(
+            {"_id": page["_id"], "text": page["text"]},
+            {"$set": {PAGE_TEXT_FIELD: compress_text(page["text"])}, "$unset": {"text": ""}},
+        )
+    return migrated
+
+
+async def migrate_archived_pages(collection, dry_run: bool) -> int:
+    migrated = 0
+    async for order in collection.find({"pages": {"$type": "string"}}, projection={"pages": 1}):
+        migrated += 1
+        if dry_run:
+            continue
+        pages = [compress_text(text) if isinstance(text, str) else text for text in order["pages"]]
+        await collection.update_one({"_id": order["_id"], "pages": order["pages"]}, {"$set": {"pages": pages}})
+    return migrated
+
+
+async def migrate(dry_run: bool = False) -> dict:
+    client = create_mongo_client(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        return {
+            "orders": await migrate_orders(db.orders, dry_run),
+            "archived orders": await migrate_orders(db.orders_archive, dry_run),
+            "pages": await migrate_pages(db.order_pages, dry_run),
+            "archived page lists": await migrate_archived_pages(db.orders_archive, dry_run),
+        }
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress the stored text of orders and pages")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be migrated")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    counts = asyncio.run(migrate(dry_run=args.dry_run))
+    for name, count in counts.items():
+        logger.info(f"{'Would compress' if args.dry_run else 'Compressed'} {count} {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import hashlib
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+# Like extraction.py, ocr_page runs inside a process pool and must not import the app.
+# pytesseract (with PIL) and pypdfium2 are optional and only imported there, on first use.
+
+
+class OCRUnavailableError(Exception):
+    """Raised when pytesseract, the tesseract binary or pypdfium2 is missing."""
+
+
+def ocr_available() -> bool:
+    return (
+        importlib.util.find_spec("pytesseract") is not None
+        and importlib.util.find_spec("pypdfium2") is not None
+        and shutil.which("tesseract") is not None
+    )
+
+
+def _cache_path(cache_dir: str, key: str) -> Path:
+    return Path(cache_dir) / key[:2] / f"{key}.txt"
+
+
+def _write_cache(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def ocr_page(pdf_path: str, page_number: int, dpi: int, lang: str, cache_dir: Optional[str]) -> dict:
+    """OCR one page (1-based) of a PDF.
+
+    The page is rendered to a grayscale bitmap first; its hash (with the
+    language) keys the text cache, so the same scan is only recognised once
+    no matter which PDF it arrives in. Returns the text with the time spent
+    and whether it came from the cache.
+    """
+    if not ocr_available():
+        raise OCRUnavailableError("pytesseract, tesseract or pypdfium2 is not installed")
+    import pypdfium2
+    import pytesseract
+
+    # One thread per tesseract run: the pool size is the whole CPU budget for OCR
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    start = time.perf_counter()
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_number - 1]
+        try:
+            image = page.render(scale=dpi / 72, grayscale=True).to_pil().convert("L")
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+    digest = hashlib.sha256(f"{image.width}x{image.height}:{lang}:".encode())
+    digest.update(image.tobytes())
+    key = digest.hexdigest()
+    path = _cache_path(cache_dir, key) if cache_dir else None
+    if path is not None and path.exists():
+        text, cached = path.read_text(encoding="utf-8"), True
+    else:
+        text, cached = pytesseract.image_to_string(image, lang=lang).strip(), False
+        if path is not None:
+            _write_cache(path, text)
+    return {"page": page_number, "text": text, "seconds": time.perf_counter() - start, "cached": cached}
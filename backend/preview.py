@@ -0,0 +1,135 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+# Like extraction.py, render_page runs inside a process pool and must not import the app;
+# pypdfium2 is imported there on first use.
+
+PREVIEW_FORMATS = {"webp": "image/webp", "png": "image/png"}
+# Requested widths snap up to one of these so the cache holds a few sizes per page, not hundreds
+PREVIEW_WIDTHS = (160, 320, 640, 1024, 1600)
+
+
+class PageNotFoundError(Exception):
+    """Raised when the requested page does not exist in the PDF."""
+
+
+class PreviewUnavailableError(Exception):
+    """Raised when no PDF renderer is installed."""
+
+
+def snap_width(width: int) -> int:
+    for candidate in PREVIEW_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return PREVIEW_WIDTHS[-1]
+
+
+def render_page(pdf_path: str, page_number: int, width: int, fmt: str, out_path: str) -> int:
+    """Render one page (1-based) to ``out_path`` as WebP or PNG; returns the file size."""
+    try:
+        import pypdfium2
+    except ImportError:  # installed with pdfplumber, but keep the app importable without it
+        raise PreviewUnavailableError("pypdfium2 is not installed")
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        if not 1 <= page_number <= len(pdf):
+            raise PageNotFoundError(f"Page {page_number} of {len(pdf)}")
+        page = pdf[page_number - 1]
+        try:
+            bitmap = page.render(scale=width / page.get_width())
+            image = bitmap.to_pil().convert("RGB")
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+    # Write next to the target and rename, so readers never see a half-written file
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if fmt == "webp":
+                image.save(f, "WEBP", quality=70, method=4)
+            else:
+                image.save(f, "PNG", optimize=True)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return os.path.getsize(out_path)
+
+
+class PreviewCache:
+    """Rendered previews on disk, evicted least recently used once ``max_bytes`` is exceeded.
+
+    Files are named after the PDF hash, so a preview never needs invalidating
+    while its PDF exists. The LRU order lives in memory and is rebuilt from
+    file modification times at startup; with several API processes each one
+    only evicts what it knows about, which keeps the total within a small
+    multiple of the limit.
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> size, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = sorted(
+            (p for p in self.root.glob("*/*") if p.suffix[1:] in PREVIEW_FORMATS),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for path in files:
+            self._entries[str(path)] = path.stat().st_size
+            self._size += path.stat().st_size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def path_for(self, pdf_sha256: str, page: int, width: int, fmt: str) -> str:
+        # No mkdir here, this runs on the event loop; render_page creates the directory
+        return str(self.root / pdf_sha256[:2] / f"{pdf_sha256}-p{page}-w{width}.{fmt}")
+
+    def get(self, path: str) -> Optional[str]:
+        with self._lock:
+            if path not in self._entries:
+                return None
+            self._entries.move_to_end(path)
+        if not os.path.exists(path):
+            self._forget(path)
+            return None
+        return path
+
+    def add(self, path: str, size: int):
+        with self._lock:
+            self._size += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            evicted = []
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.unlink(old_path)
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._size -= self._entries.pop(path, 0)
+
+    def discard(self, pdf_sha256: str):
+        """Drop every preview of one PDF, e.g. after its order was deleted."""
+        for path in (self.root / pdf_sha256[:2]).glob(f"{pdf_sha256}-*"):
+            self._forget(str(path))
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
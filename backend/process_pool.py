@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusyError(Exception):
+    """Raised when the pool's queue is full and the job was not accepted."""
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a job did not finish within the configured timeout."""
+
+
+class PoolRestartedError(PoolBusyError):
+    """Raised when the pool was restarted (a worker died or another job timed out) under a job.
+
+    The job itself did nothing wrong, so callers treat it like a full queue and retry later.
+    """
+
+
+class WorkerPool:
+    """Bounded process pool for CPU-heavy work called from async handlers.
+
+    At most ``workers + queue_size`` jobs are admitted at once; anything
+    beyond that is rejected immediately with ``PoolBusyError`` so callers can
+    answer with backpressure instead of piling up requests. Worker processes
+    are replaced after ``max_jobs_per_worker`` jobs to cap memory growth.
+    The timeout counts from the moment a job gets a worker, not from admission.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float, max_jobs_per_worker: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._executor = None
+        self._pending = 0
+        # Jobs wait here, not in the executor's queue, so the timeout only runs while they execute
+        self._slots = None
+        self._slots_loop = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_jobs_per_worker or None,
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.workers), loop
+        return self._slots
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        # A timed-out job keeps its worker busy; drop the whole executor so the
+        # stuck process is terminated instead of silently eating a slot.
+        if self._executor is not executor:
+            return
+        self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args):
+        if self._pending >= self.capacity:
+            raise PoolBusyError()
+
+        self._pending += 1
+        try:
+            async with self._get_slots():
+                loop = asyncio.get_running_loop()
+                executor = self._get_executor()
+                future = loop.run_in_executor(executor, fn, *args)
+                try:
+                    return await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    logger.error(f"Worker job {fn.__name__} timed out after {self.timeout}s")
+                    self._restart(executor)
+                    raise PoolTimeoutError()
+                except BrokenProcessPool:
+                    logger.error(f"Worker pool broke while running {fn.__name__}, restarting")
+                    self._restart(executor)
+                    raise PoolRestartedError()
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,47 @@
+"""Recompute the dashboard statistics rollup (``order_stats``) from scratch.
+
+Run from the backend directory:
+
+    python rebuild_stats.py
+
+The API keeps the rollup current on every write; this is only needed after
+restoring a backup or editing orders directly in the database. The new
+rollup is built next to the old one and swapped in at the end.
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from cache import CollectionVersion
+from settings import create_mongo_client
+from stats import rebuild_rollup
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild() -> int:
+    client = create_mongo_client(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        rows = await rebuild_rollup(db.orders, db.order_stats)
+        # Drop cached /api/stats responses in the running API processes
+        await CollectionVersion(db.meta, "orders_version").bump()
+    finally:
+        client.close()
+    return rows
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    rows = asyncio.run(rebuild())
+    logger.info(f"Rebuilt statistics rollup with {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
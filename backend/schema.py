@@ -0,0 +1,195 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, TEXT, UpdateOne
+from pymongo.errors import OperationFailure
+
+from search import KEYED_FIELDS, TEXT_INDEX_FIELDS, TEXT_INDEX_WEIGHTS, TEXT_INDEX_LANGUAGE, field_keys
+
+logger = logging.getLogger(__name__)
+
+# Every index the orders collection needs; create_indexes() is a no-op for ones that exist
+ORDER_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel([("upload_date", DESCENDING)], name="upload_date"),
+    IndexModel([("upload_date", DESCENDING), ("id", DESCENDING)], name="upload_date_id"),
+    IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+    IndexModel([("order_number", ASCENDING)], name="order_number"),
+    IndexModel([("order_number_key", ASCENDING)], name="order_number_key"),
+    IndexModel(
+        [("pdf_sha256", ASCENDING)],
+        name="pdf_sha256_unique",
+        unique=True,
+        partialFilterExpression={"pdf_sha256": {"$type": "string"}},
+    ),
+    IndexModel([("customer_name", ASCENDING)], name="customer_name"),
+    IndexModel([("stone_type", ASCENDING)], name="stone_type"),
+    *(IndexModel([(f"{field}_key", ASCENDING)], name=f"{field}_key") for field in KEYED_FIELDS),
+    IndexModel(
+        [(field, TEXT) for field in TEXT_INDEX_FIELDS],
+        name="orders_text_terms",
+        weights=TEXT_INDEX_WEIGHTS,
+        default_language=TEXT_INDEX_LANGUAGE,
+    ),
+]
+
+# Superseded indexes; a collection can only have one text index, so the old one goes first
+REPLACED_ORDER_INDEXES = ["orders_text"]
+
+UPLOAD_JOB_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+]
+
+ORDER_PAGE_INDEXES = [
+    IndexModel([("order_id", ASCENDING), ("page", ASCENDING)], name="order_id_page", unique=True),
+]
+
+ARCHIVE_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+]
+
+
+def tombstone_indexes(retention_seconds: int) -> list:
+    # Tombstones expire once no client can still hold a sync token that old
+    return [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("deleted_at", ASCENDING)], name="deleted_at_ttl", expireAfterSeconds=retention_seconds),
+    ]
+
+
+STATS_INDEXES = [
+    IndexModel([("dimension", ASCENDING), ("value", ASCENDING)], name="dimension_value_unique", unique=True),
+    IndexModel([("dimension", ASCENDING), ("count", DESCENDING)], name="dimension_count"),
+]
+
+JOB_INDEXES = [
+    IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+    # At most one pending job per key, so enqueueing the same work twice is a no-op
+    IndexModel([("key", ASCENDING)], name="key_unique", unique=True, partialFilterExpression={"key": {"$type": "string"}}),
+]
+
+# Representative queries of the API and the index each of them should use
+QUERY_PLAN_CHECKS = [
+    ("get_order", {"id": "00000000-0000-0000-0000-000000000000"}, None),
+    ("list_orders", {}, [("upload_date", DESCENDING), ("id", DESCENDING)]),
+    ("search_order_number", {"order_number_key": {"$regex": "^A"}}, [("upload_date", DESCENDING)]),
+    ("search_customer_name", {"customer_name_key": {"$regex": "^m"}}, [("upload_date", DESCENDING)]),
+]
+
+
+async def ensure_indexes(collection, indexes=ORDER_INDEXES):
+    """Create all indexes one by one so a single conflict does not block the rest."""
+    for index in indexes:
+        name = index.document["name"]
+        try:
+            await collection.create_indexes([index])
+        except OperationFailure as e:
+            # An index with the same name/keys but different options already exists
+            logger.error(f"Could not create index {name} on {collection.name}: {e}")
+
+
+async def drop_replaced_indexes(collection, names=REPLACED_ORDER_INDEXES):
+    existing = await collection.index_information()
+    for name in names:
+        if name in existing:
+            await collection.drop_index(name)
+            logger.info(f"Dropped replaced index {name} on {collection.name}")
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+async def backfill_order_fields(collection):
+    # Orders stored before the normalised order number key existed
+    result = await collection.update_many(
+        {"order_number_key": {"$exists": False}},
+        [{"$set": {"order_number_key": {"$toUpper": "$order_number"}}}],
+    )
+    if result.modified_count:
+        logger.info(f"Backfilled order_number_key on {result.modified_count} orders")
+    # Orders stored before change tracking; they count as changed when they were uploaded
+    result = await collection.update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": "$upload_date"}}],
+    )
+    if result.modified_count:
+        logger.info(f"Backfilled updated_at on {result.modified_count} orders")
+    # Orders stored before the processing status; they were fully extracted at upload, and
+    # without a status they would never be archived
+    has_text = {"$or": [{field: {"$nin": [None, ""]}} for field in ("extracted_text", "search_text")]}
+    indexed = await collection.update_many({"status": {"$exists": False}, **has_text}, {"$set": {"status": "indexed"}})
+    result = await collection.update_many({"status": {"$exists": False}}, {"$set": {"status": "no_text"}})
+    if indexed.modified_count or result.modified_count:
+        logger.info(f"Backfilled status on {indexed.modified_count + result.modified_count} orders")
+    # Orders stored before the folded search keys; folding umlauts needs Python, not a pipeline
+    missing = {"$or": [{f"{field}_key": {"$exists": False}} for field in KEYED_FIELDS]}
+    projection = {"_id": 1, **{field: 1 for field in KEYED_FIELDS}}
+    updates = []
+    backfilled = 0
+    async for order in collection.find(missing, projection=projection):
+        updates.append(UpdateOne({"_id": order["_id"]}, {"$set": field_keys(order)}))
+        if len(updates) >= BACKFILL_BATCH_SIZE:
+            backfilled += (await collection.bulk_write(updates, ordered=False)).modified_count
+            updates = []
+    if updates:
+        backfilled += (await collection.bulk_write(updates, ordered=False)).modified_count
+    if backfilled:
+        logger.info(f"Backfilled search keys on {backfilled} orders")
+
+
+def plan_stages(plan: dict) -> set:
+    stages = {plan.get("stage")}
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages |= plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages |= plan_stages(child)
+    return stages - {None}
+
+
+async def check_query_plans(collection) -> dict:
+    """Explain the representative queries and warn about scans or in-memory sorts."""
+    report = {}
+    for name, query, sort in QUERY_PLAN_CHECKS:
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            logger.warning(f"Could not explain query {name}: {e}")
+            continue
+        stages = plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        problems = sorted(stages & {"COLLSCAN", "SORT"})
+        report[name] = {"stages": sorted(stages), "problems": problems}
+        if problems:
+            logger.warning(f"Query {name} on {collection.name} uses {', '.join(problems)}")
+    return report
+
+
+async def index_report(collection, indexes=ORDER_INDEXES) -> dict:
+    expected = {index.document["name"] for index in indexes}
+    existing = set((await collection.index_information()).keys()) - {"_id_"}
+
+    usage = {}
+    try:
+        async for stat in collection.aggregate([{"$indexStats": {}}]):
+            usage[stat["name"]] = {
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"],
+            }
+    except OperationFailure as e:
+        logger.warning(f"Could not read index statistics for {collection.name}: {e}")
+
+    return {
+        "missing": sorted(expected - existing),
+        "unexpected": sorted(existing - expected),
+        "unused": sorted(name for name in existing if usage.get(name, {}).get("ops") == 0),
+        "usage": usage,
+    }
+
+
+async def bootstrap_orders(collection):
+    await drop_replaced_indexes(collection)
+    await ensure_indexes(collection)
+    await backfill_order_fields(collection)
+    await check_query_plans(collection)
@@ -0,0 +1,95 @@
+import re
+from typing import List, Optional, Tuple
+
+SNIPPET_LENGTH = 160
+
+# Mongo's text index (version 3) is diacritic-insensitive, so "Mueller", "Müller"
+# and "Muller" behave the same there; this table applies the same folding for
+# highlighting. Every mapping keeps the string length so offsets stay valid.
+FOLD_TABLE = str.maketrans("äöüÄÖÜáàâéèêíìîóòôúùûÁÀÂÉÈÊÍÌÎÓÒÔÚÙÛ", "aouAOUaaaeeeiiiooouuuAAAEEEIIIOOOUUU")
+
+# search_text holds the distinct words of the compressed body text (see textstore.py);
+# extracted_text keeps orders written before compression searchable until they are migrated
+TEXT_INDEX_FIELDS = ["order_number", "customer_name", "stone_type", "search_text", "extracted_text"]
+TEXT_INDEX_WEIGHTS = {"order_number": 10, "customer_name": 5, "stone_type": 5, "search_text": 1, "extracted_text": 1}
+TEXT_INDEX_LANGUAGE = "german"
+
+
+def fold(text: str) -> str:
+    return text.translate(FOLD_TABLE).lower()
+
+
+def search_words(term: str) -> List[str]:
+    return re.findall(r"\w+", term)
+
+
+def order_number_key(order_number: str) -> str:
+    # Normalised copy of the order number used for case-insensitive prefix lookups
+    return order_number.upper()
+
+
+# Fields searched by prefix on a folded copy: the text index needs whole (stemmed) words,
+# so partial input like "Schmi" would find nothing there
+KEYED_FIELDS = ("customer_name", "stone_type")
+
+
+def field_key(value: str) -> List[str]:
+    # The folded value from each word on, so a prefix match finds any word start:
+    # "Hans Müller" -> ["hans muller", "muller"]
+    folded = fold(" ".join(value.split()))
+    return [folded[match.start():] for match in re.finditer(r"\w+", folded)]
+
+
+def field_keys(order: dict) -> dict:
+    return {
+        f"{field}_key": field_key(order[field]) if isinstance(order.get(field), str) else []
+        for field in KEYED_FIELDS
+    }
+
+
+def build_search_query(search_term: str, search_type: str) -> Tuple[dict, bool]:
+    """Translate a search request into a Mongo query.
+
+    Returns the query and whether it is a ``$text`` query that can be ranked
+    by text score. User input is never interpreted as a regex pattern.
+    """
+    if search_type == "order_number":
+        # Prefix-anchored, case-sensitive regex on the normalised key uses the B-tree index
+        return {"order_number_key": {"$regex": "^" + re.escape(order_number_key(search_term.strip()))}}, False
+
+    # Drop quotes and leading dashes so input is never read as phrase or negation syntax
+    text_search = " ".join(search_words(search_term))
+    if not text_search:
+        return None, False
+    if search_type in KEYED_FIELDS:
+        # Prefix-anchored regex on the folded key uses the B-tree index, like the order number
+        return {f"{search_type}_key": {"$regex": "^" + re.escape(fold(" ".join(search_term.split())))}}, False
+    return {"$text": {"$search": text_search, "$language": TEXT_INDEX_LANGUAGE}}, True
+
+
+def find_highlights(snippet: str, words: List[str]) -> List[List[int]]:
+    if not words:
+        return []
+    folded = fold(snippet)
+    highlights = []
+    for word in {fold(w) for w in words if w}:
+        start = folded.find(word)
+        while start >= 0:
+            highlights.append([start, start + len(word)])
+            start = folded.find(word, start + len(word))
+    return sorted(highlights)
+
+
+def make_snippet(text: str, term: Optional[str] = None) -> Tuple[str, List[List[int]]]:
+    """Cut a window around the first matching search word, or the beginning of the text.
+
+    Returns the snippet and the ``[start, end)`` offsets of every matched word in it.
+    """
+    words = search_words(term) if term else []
+    # Without search words the window starts at 0, so the full text never needs folding
+    folded = fold(text) if words else ""
+    positions = [p for p in (folded.find(fold(w)) for w in words) if p >= 0]
+    start = max(min(positions) - SNIPPET_LENGTH // 2, 0) if positions else 0
+    snippet = " ".join(text[start:start + SNIPPET_LENGTH].split())
+    snippet = ("…" if start > 0 else "") + snippet + ("…" if start + SNIPPET_LENGTH < len(text) else "")
+    return snippet, find_highlights(snippet, words)
@@ -1,43 +1,164 @@
-from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Form, Request, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.read_preferences import Primary
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Tuple
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import base64
+from contextlib import asynccontextmanager
+import csv
+import hashlib
 import io
-import re
-import pdfplumber
+import json
+import orjson
+import tempfile
+import zipfile
+
+from archive import archive_order, archive_query
+from blob_store import create_blob_store, BlobNotFoundError
+from cache import CollectionVersion, LRUCache, create_cache_backend, pack_response, unpack_response
+from compression import CompressionMiddleware
+from extraction import extract_pages_from_pdf, extract_order_info, join_pages, EXTRACTION_MODES
+from field_extraction import get_engine, NOT_RECOGNIZED
+from jobs import JobQueue, Worker
+from metrics import (
+    MetricsMiddleware, MongoCommandMetrics, OCR_PAGE_SECONDS, PDF_BYTES, PDF_PAGES, REGISTRY, UPLOAD_STAGE_SECONDS,
+    record_extraction,
+)
+from ocr import ocr_available, ocr_page
+from preview import (
+    PREVIEW_FORMATS, PageNotFoundError, PreviewCache, PreviewUnavailableError, render_page, snap_width,
+)
+from process_pool import WorkerPool, PoolBusyError, PoolTimeoutError
+from schema import (
+    bootstrap_orders, check_query_plans, ensure_indexes, index_report,
+    ARCHIVE_INDEXES, JOB_INDEXES, ORDER_PAGE_INDEXES, STATS_INDEXES, UPLOAD_JOB_INDEXES, tombstone_indexes,
+)
+from search import build_search_query, field_keys, make_snippet, order_number_key
+from settings import AppSettings, PoolStats, create_mongo_client, list_read_preference, mongo_client_options
+from stats import apply_rollup, build_missing_rollup, read_stats, rebuild_rollup
+from suggest import SUGGEST_FIELDS, SuggestIndex, load_suggest_counts
+from textstore import PAGE_TEXT_FIELD, TEXT_FIELD, TERMS_FIELD, compress_text, decompress_text, page_text, pop_text, text_fields
+from uploads import (
+    spool_upload, spool_zip_entries, cleanup_entries,
+    RequestSizeLimitMiddleware, SpooledUpload, TooManyFilesError, UploadTooLargeError,
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB client and everything bound to it are opened by open_resources() when the app
+# starts (see create_app) and are None until then; pools and timeouts come from MONGO_* settings
+mongo_pool_stats = PoolStats()
+client = None
+db = None
+# List and search views may read from secondaries; detail, writes and jobs stay on the primary
+orders_read = None
+# PDF binaries live in GridFS (or on local disk), orders only keep a reference
+blob_store = None
+# Cold storage for the PDFs of archived orders, configured like the hot store with ARCHIVE_PDF_*;
+# without it archived PDFs stay where they are
+archive_blob_store = None
+
+# PDF extraction runs in a separate process pool so pdfplumber never blocks the event loop
+extraction_pool = WorkerPool(
+    workers=int(os.environ.get('PDF_WORKERS', os.cpu_count() or 1)),
+    queue_size=int(os.environ.get('PDF_QUEUE_SIZE', '16')),
+    timeout=float(os.environ.get('PDF_JOB_TIMEOUT', '60')),
+    max_jobs_per_worker=int(os.environ.get('PDF_WORKER_MAX_JOBS', '50')),
+)
+PDF_RETRY_AFTER = os.environ.get('PDF_RETRY_AFTER', '5')
+
+# Pages without a text layer (scans) are OCRed with tesseract in a pool of their own; every
+# worker runs tesseract single-threaded, so OCR never takes more than OCR_WORKERS cores
+OCR_REQUESTED = os.environ.get('OCR_ENABLED', 'true').lower() == 'true'
+OCR_ENABLED = OCR_REQUESTED and ocr_available()
+ocr_pool = WorkerPool(
+    workers=int(os.environ.get('OCR_WORKERS', '1')),
+    queue_size=int(os.environ.get('OCR_QUEUE_SIZE', '4')),
+    timeout=float(os.environ.get('OCR_PAGE_TIMEOUT', '60')),
+    max_jobs_per_worker=int(os.environ.get('OCR_WORKER_MAX_JOBS', '100')),
+)
+OCR_DPI = int(os.environ.get('OCR_DPI', '300'))
+OCR_LANG = os.environ.get('OCR_LANG', 'deu')
+# Recognised text by page image hash; a few KB per page, not evicted
+OCR_CACHE_DIR = os.environ.get('OCR_CACHE_DIR') or str(ROOT_DIR / 'ocr_cache')
+# Keeps one document within the job lease; later scanned pages stay without text
+OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', '50'))
+
+# Page previews render in their own pool so they never hold up uploads
+preview_pool = WorkerPool(
+    workers=int(os.environ.get('PREVIEW_WORKERS', '2')),
+    queue_size=int(os.environ.get('PREVIEW_QUEUE_SIZE', '16')),
+    timeout=float(os.environ.get('PREVIEW_TIMEOUT', '30')),
+    max_jobs_per_worker=int(os.environ.get('PREVIEW_WORKER_MAX_JOBS', '200')),
+)
+# Opened by open_resources(): it scans its directory, which has no place in the import
+preview_cache: Optional[PreviewCache] = None
+PREVIEW_DEFAULT_WIDTH = 320
+PREVIEW_PREWARM = os.environ.get('PREVIEW_PREWARM', 'true').lower() == 'true'
+
+# Orders older than this move to orders_archive, leaving a stub in orders; 0 disables archival
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '0'))
+ARCHIVE_INTERVAL = float(os.environ.get('ARCHIVE_INTERVAL', '3600'))
+ARCHIVE_MAX_PER_RUN = int(os.environ.get('ARCHIVE_MAX_PER_RUN', '5000'))
 
-# Create the main app without a prefix
-app = FastAPI()
+# Durable queue for post-upload processing; run `python -m backend.worker` or the embedded worker.
+# Opened with the database by open_resources()
+job_queue: Optional[JobQueue] = None
+# Deferred uploads return as soon as the PDF is stored, without waiting for extraction
+UPLOAD_DEFERRED = os.environ.get('UPLOAD_DEFERRED', 'false').lower() == 'true'
+
+# "header" extracts only the first pages during the upload and completes the text afterwards
+PDF_EXTRACTION_MODE = os.environ.get('PDF_EXTRACTION_MODE', 'header')
+PDF_HEADER_PAGES = int(os.environ.get('PDF_HEADER_PAGES', '1'))
+PDF_FULL_TEXT_MODE = os.environ.get('PDF_FULL_TEXT_MODE', 'full')
+for mode in (PDF_EXTRACTION_MODE, PDF_FULL_TEXT_MODE):
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown PDF extraction mode: {mode}")
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # Define Models
+# received: PDF stored, waiting for extraction; extracted: fields known, full text pending;
+# indexed: full text stored and searchable; no_text: the PDF has no text layer;
+# archived: a stub, the full document and page texts are in orders_archive
+OrderStatus = Literal["received", "extracted", "indexed", "no_text", "archived"]
+
+class OCRPage(BaseModel):
+    seconds: float  # rendering plus recognition, or only rendering on a cache hit
+    cached: bool
+
 class Order(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     order_number: str
     customer_name: str
     stone_type: str
-    pdf_content: str  # base64 encoded PDF
+    pdf_content: Optional[str] = None  # legacy: base64 encoded PDF, see migrate_pdf_storage.py
+    pdf_file_id: Optional[str] = None  # reference into the blob store
+    pdf_size: Optional[int] = None
+    pdf_sha256: Optional[str] = None
     extracted_text: str
+    page_count: Optional[int] = None
+    text_complete: bool = True  # False while only the header pages have been extracted
+    status: OrderStatus = "indexed"
+    extra_fields: Dict[str, str] = Field(default_factory=dict)  # shop-specific fields from the extraction config
+    extraction_confidence: Dict[str, float] = Field(default_factory=dict)
+    ocr_pages: Dict[str, OCRPage] = Field(default_factory=dict)  # by page number, pages recognised by OCR
     upload_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)  # every write stamps it, see /orders/changes
+    archived_at: Optional[datetime] = None
 
 class OrderCreate(BaseModel):
     order_number: str
@@ -46,119 +167,634 @@ class OrderCreate(BaseModel):
 
 class OrderSearch(BaseModel):
     search_term: str
-    search_type: str  # "order_number", "customer_name", "stone_type", "all"
+    search_type: Literal["order_number", "customer_name", "stone_type", "all"]
+
+BULK_DELETE_MAX_IDS = 1000
 
-# Helper function to extract text from PDF
-def extract_text_from_pdf(pdf_content: bytes) -> str:
+class BulkDeleteRequest(BaseModel):
+    # Criteria are combined with AND; at least one is required
+    order_ids: Optional[List[str]] = Field(None, max_length=BULK_DELETE_MAX_IDS)
+    uploaded_before: Optional[datetime] = None
+    uploaded_after: Optional[datetime] = None
+    customer_name: Optional[str] = None
+    stone_type: Optional[str] = None
+    status: Optional[List[OrderStatus]] = None
+    dry_run: bool = False
+
+class OrderSummary(BaseModel):
+    id: str
+    order_number: str
+    customer_name: str
+    stone_type: str
+    upload_date: datetime
+    status: Optional[OrderStatus] = None
+    extracted_text: Optional[str] = None  # only with fields=extracted_text
+    snippet: Optional[str] = None  # only with fields=snippet
+    highlights: Optional[List[List[int]]] = None  # [start, end) offsets of search words in snippet
+    score: Optional[float] = None  # text search relevance
+
+# Only these fields are loaded for list and search views, never the PDF or full text
+SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "order_number": 1, "customer_name": 1, "stone_type": 1, "upload_date": 1, "status": 1,
+}
+OPTIONAL_SUMMARY_FIELDS = {"extracted_text", "snippet"}
+
+def parse_summary_fields(fields: Optional[str]) -> set:
+    requested = {f.strip() for f in (fields or "").split(",") if f.strip()}
+    unknown = requested - OPTIONAL_SUMMARY_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unbekannte Felder: {', '.join(sorted(unknown))}")
+    return requested
+
+def summary_projection(requested: set) -> dict:
+    projection = dict(SUMMARY_PROJECTION)
+    if requested:
+        projection[TEXT_FIELD] = 1
+        projection["extracted_text"] = 1
+    return projection
+
+SUMMARY_FIELDS = tuple(OrderSummary.model_fields)
+# The detail view never inlines legacy base64 PDFs, those are served by /order/{id}/pdf
+DETAIL_PROJECTION = {
+    "_id": 0, "pdf_content": 0, "order_number_key": 0, "customer_name_key": 0, "stone_type_key": 0, TERMS_FIELD: 0,
+}
+ARCHIVE_DETAIL_PROJECTION = {**DETAIL_PROJECTION, "pages": 0}
+ORDER_FIELDS = tuple(Order.model_fields)
+ORDER_DEFAULTS = {
+    name: field.default for name, field in Order.model_fields.items()
+    if field.default_factory is None and not field.is_required()
+}
+
+def to_summary(order: dict, requested: set, term: Optional[str] = None) -> dict:
+    extracted_text = pop_text(order)
+    if "extracted_text" in requested:
+        order["extracted_text"] = extracted_text
+    if "snippet" in requested:
+        order["snippet"], highlights = make_snippet(extracted_text, term)
+        if term:
+            order["highlights"] = highlights
+    # Rows come from our own collection through a fixed projection, so they are mapped, not validated
+    return {name: order[name] for name in SUMMARY_FIELDS if order.get(name) is not None}
+
+def to_detail(order: dict) -> dict:
+    order["extracted_text"] = pop_text(order)
+    detail = {name: order.get(name, ORDER_DEFAULTS.get(name)) for name in ORDER_FIELDS}
+    for name in ("extra_fields", "extraction_confidence", "ocr_pages"):
+        if detail[name] is None:
+            detail[name] = {}
+    return detail
+
+def dumps(payload) -> bytes:
+    # orjson handles datetimes natively; anything else goes through FastAPI's encoder
+    return orjson.dumps(payload, default=jsonable_encoder)
+
+# Rendered list, detail and search responses. Keys embed the orders version,
+# so every write makes all earlier entries unreachable and they age out of the LRU.
+RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL')
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+response_cache = create_cache_backend(
+    RESPONSE_CACHE_URL,
+    maxsize=RESPONSE_CACHE_SIZE,
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '300')),
+)
+RESPONSE_CACHE_ENABLED = bool(RESPONSE_CACHE_URL) or RESPONSE_CACHE_SIZE > 0
+# False when list reads may go to a secondary (see open_resources): a lagging read must not be
+# cached under the current version, so those responses are rebuilt on every request
+list_reads_cacheable = True
+# Opened with the database by open_resources()
+orders_version: Optional[CollectionVersion] = None
+# Bumped only by writes that change an order number, customer name or stone type
+suggest_version: Optional[CollectionVersion] = None
+
+# Prefix index for search-as-you-type, kept in step with local writes and rebuilt when
+# the suggest version shows a change from another process
+suggest_index = SuggestIndex(ignore_values={NOT_RECOGNIZED})
+suggest_rebuild: Optional[asyncio.Task] = None
+
+async def orders_changed(added: List[dict] = (), removed: List[dict] = ()):
+    # Every write to orders goes through here: invalidates cached responses, updates suggestions
+    # and the statistics rollup
+    await apply_rollup(db.order_stats, added, removed)
+    await orders_version.bump()
+    if suggest_index.changes(added, removed):
+        suggest_index.apply(await suggest_version.bump(), added, removed)
+
+async def record_orders_changed(added: List[dict] = (), removed: List[dict] = ()):
+    # For writes that are already committed: a failure here must not undo them or skip their follow-up
+    # work. Cached responses expire with their TTL; the statistics need rebuild_stats.py.
     try:
-        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            return text
+        await orders_changed(added, removed)
     except Exception as e:
-        logging.error(f"Error extracting text from PDF: {e}")
-        return ""
-
-# Helper function to extract structured data from text
-def extract_order_info(text: str):
-    # Extract order number patterns (assuming formats like "Auftrag: 12345", "Auftragsnummer: A-2023-001", etc.)
-    order_patterns = [
-        r"Auftrag(?:s?nummer)?[:\-\s]+([A-Z0-9\-]+)",
-        r"Order[:\-\s]+([A-Z0-9\-]+)",
-        r"Nr[:\-\s]+([A-Z0-9\-]+)"
-    ]
+        logging.error(f"Could not record order change: {e}")
+
+async def rebuild_suggest_index():
+    version = await suggest_version.get()
+    suggest_index.load(version, await load_suggest_counts(db.orders))
+    logging.info(f"Suggest index built with {len(suggest_index)} values")
+
+def schedule_suggest_rebuild():
+    global suggest_rebuild
+    if suggest_rebuild is None or suggest_rebuild.done():
+        suggest_rebuild = run_in_background(rebuild_suggest_index())
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # Weak comparison: compressed responses carry the ETag as W/"..." (see compression.py)
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (
+        if_none_match.strip() == "*" or etag.removeprefix("W/") in [
+            t.strip().removeprefix("W/") for t in if_none_match.split(",")
+        ]
+    )
+
+async def cached_response(request: Request, key: str, build, store: bool = True) -> Response:
+    # build() returns the payload; it only runs on a cache miss and its errors are not cached.
+    # With store=False it runs every time and only the ETag handling applies.
+    version = await orders_version.get()
+    cache_key = f"{key}@{version}"
+    cached = await response_cache.get(cache_key) if store else None
+    if cached is None:
+        body = dumps(await build())
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if store:
+            await response_cache.set(cache_key, pack_response(etag, body))
+    else:
+        etag, body = unpack_response(cached)
     
-    order_number = ""
-    for pattern in order_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            order_number = match.group(1)
-            break
+    # no-cache: clients may store the body but must revalidate, which costs a 304
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+# API Routes
+@api_router.get("/")
+async def root():
+    return {"message": "Steinmetz Auftragsverwaltung API"}
+
+def extraction_unavailable(e: Exception) -> HTTPException:
+    if isinstance(e, PoolBusyError):
+        return HTTPException(
+            status_code=503,
+            detail="Server ausgelastet, bitte später erneut versuchen",
+            headers={"Retry-After": PDF_RETRY_AFTER},
+        )
+    return HTTPException(status_code=504, detail="Zeitüberschreitung bei der PDF-Verarbeitung")
+
+DUPLICATE_PROJECTION = {"_id": 0, "id": 1, "order_number": 1, "customer_name": 1, "stone_type": 1}
+
+# Extraction results by PDF hash, so a retried or re-uploaded PDF skips pdfplumber
+extraction_cache = LRUCache(
+    maxsize=int(os.environ.get('EXTRACTION_CACHE_SIZE', '128')),
+    ttl=float(os.environ.get('EXTRACTION_CACHE_TTL', '3600')),
+)
+
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', str(100 * 1024 * 1024)))
+UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR') or None
+
+def too_large_detail(limit: int) -> str:
+    return f"Datei zu groß (maximal {round(limit / (1024 * 1024), 1):g} MB)"
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=too_large_detail(MAX_UPLOAD_SIZE))
+
+async def find_duplicate(pdf_sha256: str) -> Optional[dict]:
+    return await db.orders.find_one({"pdf_sha256": pdf_sha256}, projection=DUPLICATE_PROJECTION)
+
+async def run_extraction(path: str, mode: str) -> dict:
+    try:
+        # The worker reads the file itself, the bytes never pass through this process
+        with UPLOAD_STAGE_SECONDS.time(stage=f"extract_{mode}"):
+            return await extraction_pool.run(extract_pages_from_pdf, path, mode, PDF_HEADER_PAGES)
+    except (PoolBusyError, PoolTimeoutError) as e:
+        raise extraction_unavailable(e)
+
+async def process_pdf(upload: SpooledUpload) -> Tuple[dict, bool, List[str]]:
+    # Returns the order document to insert and its page texts,
+    # or the existing order if these exact bytes were uploaded before
+    with UPLOAD_STAGE_SECONDS.time(stage="dedup"):
+        existing = await find_duplicate(upload.sha256)
+    if existing:
+        return existing, True, []
+    PDF_BYTES.observe(upload.size)
     
-    # Extract customer name patterns
-    customer_patterns = [
-        r"Kunde[:\-\s]+([A-Za-zäöüß\s]+)",
-        r"Auftraggeber[:\-\s]+([A-Za-zäöüß\s]+)",
-        r"Customer[:\-\s]+([A-Za-z\s]+)"
-    ]
+    cached = extraction_cache.get(upload.sha256)
+    if cached is None:
+        pages = await run_extraction(upload.path, PDF_EXTRACTION_MODE)
+        if not join_pages(pages["pages"]).strip() and not pages["complete"]:
+            # Nothing on the header pages, the text may start further in
+            pages = await run_extraction(upload.path, PDF_FULL_TEXT_MODE)
+        pages = await ocr_empty_pages(upload.path, pages, PDF_HEADER_PAGES)
+        
+        # Extract structured information
+        extracted_text = join_pages(pages["pages"])
+        order_info = None
+        if extracted_text.strip():
+            with UPLOAD_STAGE_SECONDS.time(stage="fields"):
+                order_info = extract_order_info(extracted_text)
+            record_extraction(order_info, NOT_RECOGNIZED)
+        PDF_PAGES.observe(pages["page_count"])
+        cached = (pages, order_info)
+        # Only complete results: a failed OCR page may succeed on the next attempt
+        if order_info is not None and not pages.get("ocr_failed"):
+            extraction_cache.set(upload.sha256, cached)
+    pages, order_info = cached
     
-    customer_name = ""
-    for pattern in customer_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            customer_name = match.group(1).strip()
-            break
+    if order_info is None:
+        if pages.get("ocr_failed"):
+            raise HTTPException(
+                status_code=503,
+                detail="Texterkennung fehlgeschlagen, bitte später erneut versuchen",
+                headers={"Retry-After": PDF_RETRY_AFTER},
+            )
+        raise HTTPException(status_code=400, detail="Kein Text im PDF gefunden")
     
-    # Extract stone type patterns
-    stone_patterns = [
-        r"Stein(?:art)?[:\-\s]+([A-Za-zäöüß\s]+)",
-        r"Material[:\-\s]+([A-Za-zäöüß\s]+)",
-        r"Granit|Marmor|Kalkstein|Sandstein|Schiefer|Basalt|Travertin"
-    ]
+    # Store the PDF outside the order document
+    with UPLOAD_STAGE_SECONDS.time(stage="store_pdf"):
+        pdf_file_id = await blob_store.put_file(
+            upload.path, upload.filename, metadata={"sha256": upload.sha256, "content_type": "application/pdf"}
+        )
+    
+    order = Order(
+        order_number=order_info["order_number"],
+        customer_name=order_info["customer_name"],
+        stone_type=order_info["stone_type"],
+        extra_fields=order_info["extra_fields"],
+        extraction_confidence=order_info["confidence"],
+        ocr_pages=pages.get("ocr", {}),
+        pdf_file_id=pdf_file_id,
+        pdf_size=upload.size,
+        pdf_sha256=upload.sha256,
+        extracted_text=join_pages(pages["pages"]),
+        page_count=pages["page_count"],
+        text_complete=pages["complete"],
+        status="indexed" if pages["complete"] else "extracted"
+    )
+    order_doc = order_document(order)
+    return order_doc, False, pages["pages"]
+
+def order_document(order: Order) -> dict:
+    # The model carries the plain text; the stored document only its compressed form and search terms
+    order_doc = order.dict()
+    order_doc.update(text_fields(order_doc.pop("extracted_text")))
+    order_doc["order_number_key"] = order_number_key(order.order_number)
+    order_doc.update(field_keys(order_doc))
+    return order_doc
+
+async def ocr_empty_pages(path: str, pages: dict, max_page: Optional[int] = None) -> dict:
+    # Fills pages without a text layer; with max_page, later ones are left to the index job.
+    # Pages whose OCR timed out or failed are listed under "ocr_failed".
+    empty = [number for number, text in enumerate(pages["pages"], start=1) if not text.strip()]
+    if not OCR_ENABLED or not empty:
+        return pages
     
-    stone_type = ""
-    for pattern in stone_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            stone_type = match.group(1).strip() if match.groups() else match.group(0)
+    limit = min(max_page or OCR_MAX_PAGES, OCR_MAX_PAGES)
+    texts, ocr, failed = list(pages["pages"]), dict(pages.get("ocr", {})), []
+    for number in empty:
+        if number > limit:
             break
+        try:
+            # One page per pool job: documents take turns instead of one scan holding every worker
+            result = await ocr_pool.run(ocr_page, path, number, OCR_DPI, OCR_LANG, OCR_CACHE_DIR)
+        except PoolBusyError as e:
+            raise extraction_unavailable(e)
+        except Exception as e:
+            logging.warning(f"OCR failed on page {number}: {e!r}")
+            failed.append(number)
+            continue
+        OCR_PAGE_SECONDS.observe(result["seconds"], result="cached" if result["cached"] else "ocr")
+        texts[number - 1] = result["text"]
+        ocr[str(number)] = {"seconds": round(result["seconds"], 3), "cached": result["cached"]}
     
+    if ocr:
+        timings = ", ".join(
+            f"{page}: {info['seconds']:.2f}s{' (cached)' if info['cached'] else ''}" for page, info in ocr.items()
+        )
+        logging.info(f"OCR of {len(ocr)} pages at {OCR_DPI} dpi ({OCR_LANG}): {timings}")
+    complete = pages["complete"] and (max_page is None or all(number <= limit for number in empty))
+    return dict(pages, pages=texts, ocr=ocr, ocr_failed=failed, complete=complete)
+
+async def save_order_pages(order_id: str, pages: List[str]):
+    # Per-page text lives next to the order so snippets and previews never re-parse the PDF
+    with UPLOAD_STAGE_SECONDS.time(stage="save_pages"):
+        await db.order_pages.delete_many({"order_id": order_id})
+        if pages:
+            await db.order_pages.insert_many(
+                [
+                    {"order_id": order_id, "page": number, PAGE_TEXT_FIELD: compress_text(text)}
+                    for number, text in enumerate(pages, start=1)
+                ]
+            )
+
+# Strong references to running background tasks so they are not garbage collected mid-flight
+background_jobs = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+    return task
+
+def blob_store_for(order: dict):
+    if order.get("pdf_storage") != "archive":
+        return blob_store
+    if archive_blob_store is None:
+        # Archived with ARCHIVE_PDF_STORAGE set, which has since been removed
+        raise BlobNotFoundError(order.get("pdf_file_id"))
+    return archive_blob_store
+
+async def extract_stored_pdf(pdf_file_id: str, mode: str) -> dict:
+    # Jobs only get the blob id; copy the PDF to a temp file the extraction worker can open
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_DIR, prefix="job-", suffix=".pdf") as tmp:
+        await blob_store.download_to_file(pdf_file_id, tmp.name)
+        pages = await run_extraction(tmp.name, mode)
+        if mode == "header" and not join_pages(pages["pages"]).strip() and not pages["complete"]:
+            pages = await run_extraction(tmp.name, PDF_FULL_TEXT_MODE)
+        return await ocr_empty_pages(tmp.name, pages, PDF_HEADER_PAGES if mode == "header" else None)
+
+async def handle_extract_order(payload: dict):
+    # received -> extracted: detect the order fields of a PDF stored by a deferred upload
+    order = await db.orders.find_one({"id": payload["order_id"]}, projection={"status": 1, "pdf_file_id": 1})
+    if not order or order.get("status") != "received":
+        return
+    
+    pages = await extract_stored_pdf(order["pdf_file_id"], PDF_EXTRACTION_MODE)
+    extracted_text = join_pages(pages["pages"])
+    if not extracted_text.strip():
+        await db.orders.update_one(
+            {"id": payload["order_id"], "status": "received"},
+            {"$set": {"status": "no_text", "updated_at": datetime.utcnow()}},
+        )
+        await orders_changed()
+        return
+    
+    with UPLOAD_STAGE_SECONDS.time(stage="fields"):
+        order_info = extract_order_info(extracted_text)
+    record_extraction(order_info, NOT_RECOGNIZED)
+    PDF_PAGES.observe(pages["page_count"])
+    await save_order_pages(payload["order_id"], pages["pages"])
+    result = await db.orders.update_one(
+        {"id": payload["order_id"], "status": "received"},
+        {"$set": {
+            "order_number": order_info["order_number"],
+            "order_number_key": order_number_key(order_info["order_number"]),
+            "customer_name": order_info["customer_name"],
+            "stone_type": order_info["stone_type"],
+            **field_keys(order_info),
+            "extra_fields": order_info["extra_fields"],
+            "extraction_confidence": order_info["confidence"],
+            "ocr_pages": pages.get("ocr", {}),
+            **text_fields(extracted_text),
+            "page_count": pages["page_count"],
+            "text_complete": pages["complete"],
+            "status": "indexed" if pages["complete"] else "extracted",
+            "updated_at": datetime.utcnow(),
+        }, "$unset": {"extracted_text": ""}},
+    )
+    if not result.matched_count:
+        return
+    # The placeholder fields are swapped for the extracted ones; the suggest index skips NOT_RECOGNIZED
+    placeholder = {"customer_name": NOT_RECOGNIZED, "stone_type": NOT_RECOGNIZED}
+    await orders_changed(added=[order_info], removed=[placeholder])
+    if not pages["complete"]:
+        await enqueue_index_order(payload["order_id"])
+
+async def handle_index_order(payload: dict):
+    # extracted -> indexed: replace the header-only text with the text of every page
+    order = await db.orders.find_one({"id": payload["order_id"]}, projection={"status": 1, "pdf_file_id": 1})
+    if not order or order.get("status") != "extracted":
+        return
+    
+    pages = await extract_stored_pdf(order["pdf_file_id"], PDF_FULL_TEXT_MODE)
+    await save_order_pages(payload["order_id"], pages["pages"])
+    await db.orders.update_one(
+        {"id": payload["order_id"], "status": "extracted"},
+        {"$set": {
+            **text_fields(join_pages(pages["pages"])),
+            "ocr_pages": pages.get("ocr", {}),
+            "page_count": pages["page_count"],
+            "text_complete": True,
+            "status": "indexed",
+            "updated_at": datetime.utcnow(),
+        }, "$unset": {"extracted_text": ""}},
+    )
+    await orders_changed()
+
+async def handle_archive_orders(payload: dict):
+    # Oldest first and bounded per run, a large backlog drains over several runs
+    days = payload.get("older_than_days") or ARCHIVE_AFTER_DAYS
+    if days <= 0:
+        return
+    now = datetime.utcnow()
+    # Stay well inside the job lease so a second worker never picks up the same run
+    deadline = asyncio.get_running_loop().time() + job_queue.lease_seconds / 2
+    orders = db.orders.find(
+        archive_query(now - timedelta(days=days)), projection={"_id": 0},
+    ).sort("upload_date", 1).limit(ARCHIVE_MAX_PER_RUN)
+    archived = 0
+    try:
+        async for order in orders:
+            if await archive_order(db, order, now, blob_store, archive_blob_store, UPLOAD_TMP_DIR):
+                archived += 1
+            if asyncio.get_running_loop().time() > deadline:
+                break
+    finally:
+        await orders.close()
+        if archived:
+            # Suggest values are unchanged, stubs keep every suggested field
+            await orders_changed()
+            logging.info(f"Archived {archived} orders uploaded before {now - timedelta(days=days):%Y-%m-%d}")
+
+JOB_HANDLERS = {
+    "extract_order": handle_extract_order,
+    "index_order": handle_index_order,
+    "archive_orders": handle_archive_orders,
+}
+
+async def enqueue_extract_order(order_id: str):
+    await job_queue.enqueue("extract_order", {"order_id": order_id}, key=f"extract_order:{order_id}")
+
+async def enqueue_index_order(order_id: str):
+    await job_queue.enqueue("index_order", {"order_id": order_id}, key=f"index_order:{order_id}")
+
+# The job that moves an order on from each unfinished status
+STATUS_JOBS = {"received": "extract_order", "extracted": "index_order"}
+
+async def enqueue_stranded_orders():
+    # Orders are inserted before their job is queued; if that enqueue failed, nothing would ever
+    # pick them up. Pending jobs keep their key, so orders that have one are skipped; so are
+    # orders whose job ended in the dead letters.
+    queued = 0
+    orders = db.orders.find({"status": {"$in": list(STATUS_JOBS)}}, projection={"_id": 0, "id": 1, "status": 1})
+    try:
+        async for order in orders:
+            job_type = STATUS_JOBS[order["status"]]
+            key = f"{job_type}:{order['id']}"
+            if await job_queue.dead_letters.find_one({"key": key}, projection={"_id": 1}):
+                continue
+            queued += await job_queue.enqueue(job_type, {"order_id": order["id"]}, key=key)
+    except Exception as e:
+        logging.error(f"Could not queue jobs for stranded orders: {e}")
+    if queued:
+        logging.warning(f"Queued jobs for {queued} orders that had none")
+
+async def enqueue_archive_orders(older_than_days: Optional[int] = None) -> bool:
+    payload = {"older_than_days": older_than_days} if older_than_days else {}
+    return await job_queue.enqueue("archive_orders", payload, key="archive_orders")
+
+async def schedule_archival(stop: asyncio.Event):
+    # Every API process schedules; the job key keeps it to one pending run at a time
+    while not stop.is_set():
+        try:
+            await enqueue_archive_orders()
+        except Exception as e:
+            logging.error(f"Could not schedule order archival: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), ARCHIVE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+async def after_insert(order_doc: dict, pages: List[str]):
+    await save_order_pages(order_doc["id"], pages)
+    if order_doc["status"] == "extracted":
+        await enqueue_index_order(order_doc["id"])
+    prewarm_preview(order_doc)
+
+# Renders in progress by cache path, so concurrent requests for one preview render it once
+previews_in_flight: Dict[str, asyncio.Task] = {}
+
+async def render_preview(order: dict, page: int, width: int, fmt: str) -> str:
+    path = preview_cache.path_for(order["pdf_sha256"], page, width, fmt)
+    if preview_cache.get(path):
+        return path
+    task = previews_in_flight.get(path)
+    if task is None:
+        task = asyncio.create_task(render_preview_file(order, page, width, fmt, path))
+        previews_in_flight[path] = task
+        task.add_done_callback(lambda _: previews_in_flight.pop(path, None))
+    # Shielded: a client that goes away does not cancel the render for the others
+    return await asyncio.shield(task)
+
+async def render_preview_file(order: dict, page: int, width: int, fmt: str, path: str) -> str:
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_DIR, prefix="preview-", suffix=".pdf") as tmp:
+        if order.get("pdf_file_id"):
+            await blob_store_for(order).download_to_file(order["pdf_file_id"], tmp.name)
+        else:
+            tmp.write(base64.b64decode(order["pdf_content"]))
+            tmp.flush()
+        # The worker writes the image straight into the cache, only its size comes back
+        size = await preview_pool.run(render_page, tmp.name, page, width, fmt, path)
+    preview_cache.add(path, size)
+    return path
+
+def prewarm_preview(order_doc: dict):
+    # Page 1 at the list width, so the first look at a new order is a cache hit
+    if not PREVIEW_PREWARM or not order_doc.get("pdf_file_id"):
+        return
+    
+    async def prewarm():
+        try:
+            await render_preview(order_doc, 1, PREVIEW_DEFAULT_WIDTH, "webp")
+        except Exception as e:
+            logging.warning(f"Could not prewarm preview for order {order_doc['id']}: {e!r}")
+    
+    run_in_background(prewarm())
+
+async def store_received_order(upload: SpooledUpload) -> Tuple[dict, bool]:
+    # Deferred upload: persist the PDF and a placeholder order, extraction runs as a job
+    existing = await find_duplicate(upload.sha256)
+    if existing:
+        return existing, True
+    
+    pdf_file_id = await blob_store.put_file(
+        upload.path, upload.filename, metadata={"sha256": upload.sha256, "content_type": "application/pdf"}
+    )
+    order = Order(
+        order_number=NOT_RECOGNIZED,
+        customer_name=NOT_RECOGNIZED,
+        stone_type=NOT_RECOGNIZED,
+        pdf_file_id=pdf_file_id,
+        pdf_size=upload.size,
+        pdf_sha256=upload.sha256,
+        extracted_text="",
+        text_complete=False,
+        status="received",
+    )
+    order_doc = order_document(order)
+    order_doc, duplicate = await insert_order(order_doc)
+    if not duplicate:
+        await enqueue_extract_order(order_doc["id"])
+        prewarm_preview(order_doc)
+    return order_doc, duplicate
+
+def extracted_info(order_doc: dict) -> dict:
     return {
-        "order_number": order_number or "Nicht erkannt",
-        "customer_name": customer_name or "Nicht erkannt", 
-        "stone_type": stone_type or "Nicht erkannt"
+        "order_number": order_doc["order_number"],
+        "customer_name": order_doc["customer_name"],
+        "stone_type": order_doc["stone_type"]
     }
 
-# API Routes
-@api_router.get("/")
-async def root():
-    return {"message": "Steinmetz Auftragsverwaltung API"}
+async def insert_order(order_doc: dict) -> Tuple[dict, bool]:
+    # A concurrent upload of the same bytes may win the race on the unique hash index
+    try:
+        with UPLOAD_STAGE_SECONDS.time(stage="insert"):
+            await db.orders.insert_one(order_doc)
+    except DuplicateKeyError:
+        await blob_store.delete(order_doc["pdf_file_id"])
+        existing = await find_duplicate(order_doc["pdf_sha256"])
+        if not existing:
+            raise
+        return existing, True
+    except Exception:
+        await blob_store.delete(order_doc["pdf_file_id"])
+        raise
+    # The order is committed from here on, its PDF must stay
+    await record_orders_changed(added=[order_doc])
+    return order_doc, False
 
 @api_router.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...), defer: bool = Query(UPLOAD_DEFERRED)):
     try:
         # Validate file type
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Nur PDF-Dateien sind erlaubt")
         
-        # Read file content
-        pdf_content = await file.read()
-        
-        # Extract text from PDF
-        extracted_text = extract_text_from_pdf(pdf_content)
+        # Stream file content to disk, hashing and enforcing the size limit on the way
+        try:
+            with UPLOAD_STAGE_SECONDS.time(stage="spool"):
+                upload = await spool_upload(file, MAX_UPLOAD_SIZE, UPLOAD_TMP_DIR)
+        except UploadTooLargeError:
+            raise upload_too_large()
         
-        if not extracted_text.strip():
-            raise HTTPException(status_code=400, detail="Kein Text im PDF gefunden")
+        try:
+            if defer:
+                order_doc, duplicate = await store_received_order(upload)
+            else:
+                order_doc, duplicate, pages = await process_pdf(upload)
+                
+                # Save to database
+                if not duplicate:
+                    order_doc, duplicate = await insert_order(order_doc)
+                    if not duplicate:
+                        await after_insert(order_doc, pages)
+        finally:
+            upload.cleanup()
         
-        # Extract structured information
-        order_info = extract_order_info(extracted_text)
-        
-        # Convert PDF to base64
-        pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
-        
-        # Create order object
-        order = Order(
-            order_number=order_info["order_number"],
-            customer_name=order_info["customer_name"],
-            stone_type=order_info["stone_type"],
-            pdf_content=pdf_base64,
-            extracted_text=extracted_text
-        )
-        
-        # Save to database
-        result = await db.orders.insert_one(order.dict())
+        if defer and not duplicate:
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "message": "PDF gespeichert, Verarbeitung läuft",
+                    "order_id": order_doc["id"],
+                    "duplicate": False,
+                    "status": "received",
+                },
+            )
         
         return {
-            "message": "PDF erfolgreich hochgeladen und verarbeitet",
-            "order_id": order.id,
-            "extracted_info": {
-                "order_number": order.order_number,
-                "customer_name": order.customer_name,
-                "stone_type": order.stone_type
-            }
+            "message": "PDF war bereits vorhanden" if duplicate else "PDF erfolgreich hochgeladen und verarbeitet",
+            "order_id": order_doc["id"],
+            "duplicate": duplicate,
+            "extracted_info": extracted_info(order_doc)
         }
         
     except HTTPException:
@@ -167,37 +803,219 @@ async def upload_pdf(file: UploadFile = File(...)):
         logging.error(f"Error uploading PDF: {e}")
         raise HTTPException(status_code=500, detail="Fehler beim Hochladen des PDFs")
 
-@api_router.post("/search-orders")
-async def search_orders(search: OrderSearch):
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '500'))
+BATCH_MAX_ZIP_SIZE = int(os.environ.get('BATCH_MAX_ZIP_SIZE', str(1024 * 1024 * 1024)))
+# Whole request body of a batch upload, checked before it is parsed (see RequestSizeLimitMiddleware)
+BATCH_MAX_REQUEST_SIZE = int(os.environ.get('BATCH_MAX_REQUEST_SIZE', str(BATCH_MAX_ZIP_SIZE)))
+BATCH_BUSY_RETRIES = 5
+
+async def collect_batch_files(files: List[UploadFile]) -> List[tuple]:
+    # Returns (filename, upload, error) tuples; the caller must clean up the spooled files
+    entries = []
+    too_many_files = HTTPException(status_code=413, detail=f"Zu viele Dateien (maximal {BATCH_MAX_FILES})")
     try:
-        # Build search query
-        query = {}
-        
-        if search.search_type == "order_number":
-            query["order_number"] = {"$regex": search.search_term, "$options": "i"}
-        elif search.search_type == "customer_name":
-            query["customer_name"] = {"$regex": search.search_term, "$options": "i"}
-        elif search.search_type == "stone_type":
-            query["stone_type"] = {"$regex": search.search_term, "$options": "i"}
-        elif search.search_type == "all":
-            query = {
-                "$or": [
-                    {"order_number": {"$regex": search.search_term, "$options": "i"}},
-                    {"customer_name": {"$regex": search.search_term, "$options": "i"}},
-                    {"stone_type": {"$regex": search.search_term, "$options": "i"}}
-                ]
-            }
+        for file in files:
+            name = file.filename or ""
+            if len(entries) >= BATCH_MAX_FILES:
+                raise too_many_files
+            if name.lower().endswith('.zip'):
+                try:
+                    archive = await spool_upload(file, BATCH_MAX_ZIP_SIZE, UPLOAD_TMP_DIR)
+                except UploadTooLargeError:
+                    entries.append((name, None, "Datei zu groß"))
+                    continue
+                try:
+                    entries.extend(await asyncio.to_thread(
+                        spool_zip_entries, archive.path, MAX_UPLOAD_SIZE, BATCH_MAX_FILES - len(entries), UPLOAD_TMP_DIR
+                    ))
+                except zipfile.BadZipFile:
+                    entries.append((name, None, "Ungültiges ZIP-Archiv"))
+                except TooManyFilesError:
+                    raise too_many_files
+                finally:
+                    archive.cleanup()
+            elif not name.lower().endswith('.pdf'):
+                entries.append((name, None, "Nur PDF-Dateien sind erlaubt"))
+            else:
+                try:
+                    entries.append((name, await spool_upload(file, MAX_UPLOAD_SIZE, UPLOAD_TMP_DIR), None))
+                except UploadTooLargeError:
+                    entries.append((name, None, "Datei zu groß"))
+    except BaseException:
+        cleanup_entries(entries)
+        raise
+    return entries
+
+async def process_batch(entries: List[tuple], on_progress=None) -> List[dict]:
+    # Keep this batch within the pool size so single uploads are not starved by it
+    semaphore = asyncio.Semaphore(extraction_pool.workers)
+    
+    async def prepare(upload: SpooledUpload):
+        for attempt in range(BATCH_BUSY_RETRIES + 1):
+            try:
+                async with semaphore:
+                    return await process_pdf(upload)
+            except HTTPException as e:
+                if e.status_code != 503 or attempt == BATCH_BUSY_RETRIES:
+                    raise
+            await asyncio.sleep(2 ** attempt)
+    
+    async def prepare_entry(filename: str, upload: Optional[SpooledUpload], error: Optional[str]):
+        result = {"filename": filename}
+        if error:
+            result.update(status="error", detail=error)
+        else:
+            try:
+                order_doc, duplicate, pages = await prepare(upload)
+                result.update(status="ok", order=order_doc, duplicate=duplicate, pages=pages)
+            except HTTPException as e:
+                result.update(status="error", detail=e.detail)
+            except Exception as e:
+                logging.error(f"Error processing {filename} in batch: {e}")
+                result.update(status="error", detail="Fehler beim Verarbeiten des PDFs")
+        if on_progress:
+            await on_progress(result)
+        return result
+    
+    results = await asyncio.gather(*(prepare_entry(*entry) for entry in entries))
+    
+    # One round trip for all orders; unordered so a single failure does not stop the rest
+    prepared = [r for r in results if r["status"] == "ok" and not r["duplicate"]]
+    write_errors = {}
+    if prepared:
+        try:
+            with UPLOAD_STAGE_SECONDS.time(stage="insert_batch"):
+                await db.orders.insert_many([r["order"] for r in prepared], ordered=False)
+        except BulkWriteError as e:
+            write_errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+        await record_orders_changed(added=[r["order"] for i, r in enumerate(prepared) if i not in write_errors])
+    
+    for index, result in enumerate(prepared):
+        error = write_errors.get(index)
+        if not error:
+            continue
+        order_doc = result["order"]
+        await blob_store.delete(order_doc["pdf_file_id"])
+        # The same bytes appeared twice in the batch or were uploaded concurrently
+        existing = await find_duplicate(order_doc["pdf_sha256"]) if error.get("code") == 11000 else None
+        if existing:
+            result.update(order=existing, duplicate=True)
+        else:
+            logging.error(f"Error saving {result['filename']} in batch: {error.get('errmsg', '')}")
+            result.pop("order")
+            result.update(status="error", detail="Fehler beim Speichern des Auftrags")
+    
+    for result in results:
+        pages = result.pop("pages", [])
+        if "order" in result:
+            order_doc = result.pop("order")
+            if not result["duplicate"]:
+                await after_insert(order_doc, pages)
+            result.update(order_id=order_doc["id"], extracted_info=extracted_info(order_doc))
+    
+    return results
+
+def batch_summary(results: List[dict]) -> dict:
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    duplicates = sum(1 for r in results if r.get("duplicate"))
+    return {
+        "results": results,
+        "count": len(results),
+        "succeeded": succeeded,
+        "duplicates": duplicates,
+        "failed": len(results) - succeeded,
+    }
+
+async def run_upload_job(job_id: str, entries: List[tuple]):
+    await db.upload_jobs.update_one({"id": job_id}, {"$set": {"status": "running"}})
+    
+    async def on_progress(result):
+        await db.upload_jobs.update_one({"id": job_id}, {"$inc": {"processed": 1}})
+    
+    try:
+        results = await process_batch(entries, on_progress=on_progress)
+        update = {"status": "done", **batch_summary(results)}
+    except Exception as e:
+        logging.error(f"Error in upload job {job_id}: {e}")
+        update = {"status": "failed", "detail": "Fehler beim Verarbeiten des Stapels"}
+    finally:
+        cleanup_entries(entries)
+    update["finished_at"] = datetime.utcnow()
+    await db.upload_jobs.update_one({"id": job_id}, {"$set": update})
+
+@api_router.post("/upload-pdfs")
+async def upload_pdfs(files: List[UploadFile] = File(...), background: bool = Query(False)):
+    try:
+        entries = await collect_batch_files(files)
+        handed_off = False
         
-        # Execute search
-        orders_cursor = db.orders.find(query).sort("upload_date", -1)
+        try:
+            if background:
+                job_id = str(uuid.uuid4())
+                await db.upload_jobs.insert_one({
+                    "id": job_id,
+                    "status": "queued",
+                    "total": len(entries),
+                    "processed": 0,
+                    "created_at": datetime.utcnow(),
+                })
+                # The job takes ownership of the spooled files
+                run_in_background(run_upload_job(job_id, entries))
+                handed_off = True
+                return JSONResponse(
+                    status_code=202,
+                    content={"job_id": job_id, "status": "queued", "status_url": f"/api/upload-jobs/{job_id}"},
+                )
+            
+            return batch_summary(await process_batch(entries))
+        finally:
+            if not handed_off:
+                cleanup_entries(entries)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error uploading PDFs: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Hochladen der PDFs")
+
+@api_router.get("/upload-jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    try:
+        job = await db.upload_jobs.find_one({"id": job_id}, projection={"_id": 0})
+        if not job:
+            raise HTTPException(status_code=404, detail="Stapelauftrag nicht gefunden")
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching upload job: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden des Stapelauftrags")
+
+@api_router.post("/search-orders")
+async def search_orders(search: OrderSearch, request: Request, fields: Optional[str] = Query(None)):
+    requested = parse_summary_fields(fields)
+    # Build search query
+    query, ranked = build_search_query(search.search_term, search.search_type)
+    if query is None:
+        return {"results": [], "count": 0}
+    key = "search:" + json.dumps([search.search_term, search.search_type, sorted(requested)], ensure_ascii=False)
+    return await cached_response(
+        request, key, lambda: run_search(search, requested, query, ranked), store=list_reads_cacheable
+    )
+
+async def run_search(search: OrderSearch, requested: set, query: dict, ranked: bool) -> dict:
+    try:
+        # Execute search, best text matches first
+        projection = summary_projection(requested)
+        sort = [("upload_date", -1)]
+        if ranked:
+            projection["score"] = {"$meta": "textScore"}
+            sort.insert(0, ("score", {"$meta": "textScore"}))
+        orders_cursor = orders_read.find(query, projection=projection).sort(sort).limit(100)
         orders_list = await orders_cursor.to_list(100)
         
-        # Remove PDF content from results (too large for response)
-        results = []
-        for order in orders_list:
-            order_dict = Order(**order).dict()
-            order_dict.pop('pdf_content', None)  # Remove large PDF content
-            results.append(order_dict)
+        results = [to_summary(order, requested, search.search_term) for order in orders_list]
         
         return {
             "results": results,
@@ -208,33 +1026,251 @@ async def search_orders(search: OrderSearch):
         logging.error(f"Error searching orders: {e}")
         raise HTTPException(status_code=500, detail="Fehler bei der Suche")
 
+ORDERS_PAGE_SIZE = 100
+ORDERS_MAX_PAGE_SIZE = 500
+# Keyset pagination walks this sort order, backed by the matching compound index
+ORDERS_SORT = [("upload_date", -1), ("id", -1)]
+
+def encode_cursor(order: dict) -> str:
+    payload = json.dumps({"d": order["upload_date"].isoformat(), "i": order["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        upload_date = datetime.fromisoformat(payload["d"])
+        order_id = str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+    # Everything strictly after the last row of the previous page
+    return {
+        "$or": [
+            {"upload_date": {"$lt": upload_date}},
+            {"upload_date": upload_date, "id": {"$lt": order_id}},
+        ]
+    }
+
 @api_router.get("/orders")
-async def get_all_orders():
+async def get_all_orders(
+    request: Request,
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=ORDERS_MAX_PAGE_SIZE),
+    stream: bool = Query(False),
+):
+    requested = parse_summary_fields(fields)
+    query = decode_cursor(cursor) if cursor else {}
+    if stream:
+        return StreamingResponse(stream_orders(query, requested, limit), media_type="application/json")
+    key = f"orders:{','.join(sorted(requested))}:{cursor or ''}:{limit}"
+    return await cached_response(
+        request, key, lambda: list_orders(query, requested, limit), store=list_reads_cacheable
+    )
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+async def stream_orders(query: dict, requested: set, limit: int):
+    # Same body as the buffered list, written row by row so large pages start arriving at once
+    orders_cursor = orders_read.find(query, projection=summary_projection(requested)).sort(ORDERS_SORT).limit(limit + 1)
+    chunk = bytearray(b'{"orders":[')
+    count, last, next_cursor = 0, None, None
     try:
-        orders_cursor = db.orders.find({}).sort("upload_date", -1)
-        orders_list = await orders_cursor.to_list(100)
+        async for order in orders_cursor:
+            if count == limit:
+                next_cursor = encode_cursor(last)
+                break
+            last = {"upload_date": order["upload_date"], "id": order["id"]}
+            if count:
+                chunk += b","
+            chunk += dumps(to_summary(order, requested))
+            count += 1
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+    except Exception as e:
+        logging.error(f"Error streaming orders: {e}")
+        raise
+    chunk += b'],"next_cursor":' + dumps(next_cursor) + b"}"
+    yield bytes(chunk)
+
+async def list_orders(query: dict, requested: set, limit: int) -> dict:
+    try:
+        # Fetch one extra row to know whether another page exists
+        orders_cursor = orders_read.find(query, projection=summary_projection(requested)).sort(ORDERS_SORT).limit(limit + 1)
+        orders_list = await orders_cursor.to_list(limit + 1)
         
-        # Remove PDF content from results
-        results = []
-        for order in orders_list:
-            order_dict = Order(**order).dict()
-            order_dict.pop('pdf_content', None)
-            results.append(order_dict)
+        next_cursor = encode_cursor(orders_list[limit - 1]) if len(orders_list) > limit else None
+        results = [to_summary(order, requested) for order in orders_list[:limit]]
         
-        return {"orders": results}
+        return {"orders": results, "next_cursor": next_cursor}
         
     except Exception as e:
         logging.error(f"Error fetching orders: {e}")
         raise HTTPException(status_code=500, detail="Fehler beim Laden der Aufträge")
 
+@api_router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    field: Optional[Literal["order_number", "customer_name", "stone_type"]] = Query(None),
+):
+    # Answered from memory; clients debounce keystrokes (~150 ms) and drop stale responses
+    if await suggest_version.get() > suggest_index.version:
+        schedule_suggest_rebuild()
+    return {"q": q, "suggestions": suggest_index.suggest(q, limit, field)}
+
+STATS_CUSTOMER_LIMIT = 20
+
+@api_router.get("/stats")
+async def get_stats(request: Request, customers: int = Query(STATS_CUSTOMER_LIMIT, ge=1, le=500)):
+    # Served from the order_stats rollup, which every write keeps current with $inc upserts
+    return await cached_response(request, f"stats:{customers}", lambda: load_stats(customers))
+
+async def load_stats(customers: int) -> dict:
+    try:
+        return await read_stats(db.order_stats, customers)
+    except Exception as e:
+        logging.error(f"Error loading stats: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden der Statistik")
+
+CHANGES_PAGE_SIZE = 500
+# Writes are stamped before they commit; every sync re-reads this far back to catch late commits
+CHANGES_OVERLAP = timedelta(seconds=int(os.environ.get('CHANGES_OVERLAP_SECONDS', '30')))
+# Tombstones are kept this long; clients with an older token start over with a full sync
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', '90'))
+CHANGES_PROJECTION = {**SUMMARY_PROJECTION, "updated_at": 1}
+
+def encode_sync_token(state: dict) -> str:
+    payload = {
+        key: [value[0].isoformat(), value[1]] if key == "a" else value.isoformat()
+        for key, value in state.items() if value is not None
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_sync_token(token: str) -> dict:
+    # s: changes since, a: (updated_at, id) of the last row sent, n: when this sync started
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        state = {key: datetime.fromisoformat(payload[key]) for key in ("s", "n") if key in payload}
+        if "a" in payload:
+            state["a"] = (datetime.fromisoformat(payload["a"][0]), str(payload["a"][1]))
+    except (ValueError, KeyError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Ungültiges Synchronisierungstoken")
+    return state
+
+@api_router.get("/orders/changes")
+async def get_order_changes(
+    since: Optional[str] = Query(None),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_PAGE_SIZE),
+):
+    """Orders changed and ids deleted since ``since``; without it, every order.
+
+    Follow ``next`` while ``has_more`` is set, then keep the last ``next`` for
+    the following sync. ``reset`` means the token was too old: drop the local
+    copy and apply this response as a full sync.
+    """
+    state = decode_sync_token(since) if since else {}
+    now = datetime.utcnow()
+    reset = False
+    if state.get("s") and state["s"] < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        # The tombstones of that period have expired, deletes would be missed
+        state, reset = {}, True
+    lower, after, started = state.get("s"), state.get("a"), state.get("n") or now
+    
+    try:
+        query = {"updated_at": {"$gte": lower}} if lower else {}
+        if after:
+            query = {"$and": [query, {"$or": [
+                {"updated_at": {"$gt": after[0]}},
+                {"updated_at": after[0], "id": {"$gt": after[1]}},
+            ]}]}
+        # From the primary: a lagging secondary could hide writes older than the overlap
+        rows = await db.orders.find(query, projection=CHANGES_PROJECTION).sort(
+            [("updated_at", 1), ("id", 1)]
+        ).limit(limit + 1).to_list(limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        deleted = []
+        if lower and not after:
+            tombstones = db.order_tombstones.find({"deleted_at": {"$gte": lower}}, projection={"_id": 0, "id": 1})
+            deleted = [tombstone["id"] async for tombstone in tombstones]
+        
+        if has_more:
+            next_state = {"s": lower, "a": (rows[-1]["updated_at"], rows[-1]["id"]), "n": started}
+        else:
+            next_state = {"s": started - CHANGES_OVERLAP}
+        return {
+            "orders": [to_summary(order, set()) for order in rows],
+            "deleted": deleted,
+            "next": encode_sync_token(next_state),
+            "has_more": has_more,
+            "reset": reset,
+        }
+        
+    except Exception as e:
+        logging.error(f"Error fetching order changes: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden der Änderungen")
+
+EXPORT_COLUMNS = ["id", "order_number", "customer_name", "stone_type", "upload_date", "extracted_text", "snippet"]
+
+@api_router.get("/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None),
+):
+    requested = parse_summary_fields(fields)
+    columns = [c for c in EXPORT_COLUMNS if c in SUMMARY_PROJECTION or c in requested]
+    
+    async def rows():
+        # Iterate the Motor cursor directly so memory stays flat regardless of collection size
+        orders_cursor = orders_read.find({}, projection=summary_projection(requested)).sort(ORDERS_SORT)
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # Right away: an empty export still gets its header, and clients see the columns early
+            writer.writerow(columns)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        try:
+            async for order in orders_cursor:
+                row = to_summary(order, requested)
+                row["upload_date"] = row["upload_date"].isoformat()
+                if format == "csv":
+                    writer.writerow([row.get(c, "") for c in columns])
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield dumps(row) + b"\n"
+        except Exception as e:
+            logging.error(f"Error exporting orders: {e}")
+            raise
+    
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    filename = f"orders-{datetime.utcnow():%Y%m%d}.{format}"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @api_router.get("/order/{order_id}")
-async def get_order(order_id: str):
+async def get_order(order_id: str, request: Request):
+    return await cached_response(request, f"order:{order_id}", lambda: load_order(order_id))
+
+async def load_order(order_id: str) -> dict:
     try:
-        order = await db.orders.find_one({"id": order_id})
+        order = await db.orders.find_one({"id": order_id}, projection=DETAIL_PROJECTION)
         if not order:
             raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+        if order.get("status") == "archived":
+            # The stub overrides status and PDF location, the rest comes from the archive
+            archived = await db.orders_archive.find_one({"id": order_id}, projection=ARCHIVE_DETAIL_PROJECTION)
+            order = {**(archived or {}), **order}
         
-        return Order(**order).dict()
+        return to_detail(order)
         
     except HTTPException:
         raise
@@ -242,12 +1278,212 @@ async def get_order(order_id: str):
         logging.error(f"Error fetching order: {e}")
         raise HTTPException(status_code=500, detail="Fehler beim Laden des Auftrags")
 
+@api_router.get("/order/{order_id}/pages")
+async def get_order_pages(order_id: str, page: Optional[int] = Query(None, ge=1)):
+    try:
+        order = await db.orders.find_one(
+            {"id": order_id}, projection={"page_count": 1, "text_complete": 1, "status": 1},
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+        
+        if order.get("status") == "archived":
+            archived = await db.orders_archive.find_one({"id": order_id}, projection={"_id": 0, "pages": 1}) or {}
+            pages = [
+                {"page": number, "text": decompress_text(text)}
+                for number, text in enumerate(archived.get("pages", []), start=1)
+                if page is None or number == page
+            ]
+        else:
+            query = {"order_id": order_id}
+            if page is not None:
+                query["page"] = page
+            pages = [
+                {"page": row["page"], "text": page_text(row)}
+                async for row in db.order_pages.find(
+                    query, projection={"_id": 0, "page": 1, "text": 1, PAGE_TEXT_FIELD: 1},
+                ).sort("page", 1)
+            ]
+        
+        return {
+            "pages": pages,
+            "page_count": order.get("page_count"),
+            "text_complete": order.get("text_complete", True),
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching order pages: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden des Auftragstexts")
+
+def parse_range_header(range_header: str, size: int):
+    # Only single byte ranges are supported ("bytes=start-end", "bytes=start-", "bytes=-suffix")
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Ungültiger Bereich angefordert",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+@api_router.get("/order/{order_id}/pdf")
+async def download_order_pdf(order_id: str, request: Request):
+    try:
+        order = await db.orders.find_one(
+            {"id": order_id},
+            projection={"pdf_file_id": 1, "pdf_sha256": 1, "pdf_content": 1, "pdf_storage": 1, "order_number": 1},
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+        
+        if order.get("pdf_file_id"):
+            store = blob_store_for(order)
+            size = await store.size(order["pdf_file_id"])
+            etag = f'"{order.get("pdf_sha256") or order["pdf_file_id"]}"'
+        elif order.get("pdf_content"):
+            # Not migrated yet, serve the inline base64 copy
+            legacy_pdf = base64.b64decode(order["pdf_content"])
+            size = len(legacy_pdf)
+            etag = f'"{hashlib.sha256(legacy_pdf).hexdigest()}"'
+        else:
+            raise HTTPException(status_code=404, detail="PDF nicht gefunden")
+        
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'inline; filename="{order_id}.pdf"',
+        }
+        
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        
+        start, end = 0, size - 1
+        status_code = 200
+        range_header = request.headers.get("range")
+        if range_header and size > 0:
+            byte_range = parse_range_header(range_header, size)
+            if byte_range:
+                start, end = byte_range
+                status_code = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(max(end - start + 1, 0))
+        
+        if order.get("pdf_file_id"):
+            body = store.iter_range(order["pdf_file_id"], start, end) if size > 0 else iter([])
+            return StreamingResponse(body, status_code=status_code, media_type="application/pdf", headers=headers)
+        return Response(legacy_pdf[start:end + 1], status_code=status_code, media_type="application/pdf", headers=headers)
+        
+    except HTTPException:
+        raise
+    except BlobNotFoundError:
+        raise HTTPException(status_code=404, detail="PDF nicht gefunden")
+    except Exception as e:
+        logging.error(f"Error streaming PDF: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden des PDFs")
+
+@api_router.get("/order/{order_id}/preview")
+async def get_order_preview(
+    order_id: str,
+    request: Request,
+    page: int = Query(1, ge=1),
+    width: int = Query(PREVIEW_DEFAULT_WIDTH, ge=16, le=4096),
+    format: Optional[Literal["webp", "png"]] = Query(None),
+):
+    try:
+        order = await db.orders.find_one(
+            {"id": order_id},
+            projection={"pdf_file_id": 1, "pdf_sha256": 1, "pdf_content": 1, "pdf_storage": 1, "page_count": 1},
+        )
+        if not order:
+            raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+        if not order.get("pdf_file_id") and not order.get("pdf_content"):
+            raise HTTPException(status_code=404, detail="PDF nicht gefunden")
+        if order.get("page_count") and page > order["page_count"]:
+            raise HTTPException(status_code=404, detail="Seite nicht gefunden")
+        if not order.get("pdf_sha256"):
+            # Not migrated yet, key the cache by the inline copy
+            order["pdf_sha256"] = hashlib.sha256(base64.b64decode(order["pdf_content"])).hexdigest()
+        
+        fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "png")
+        path = await render_preview(order, page, snap_width(width), fmt)
+        
+        # The file name includes the format, so a PNG ETag never revalidates the WebP rendering
+        headers = {"ETag": f'"{Path(path).name}"', "Cache-Control": "private, max-age=86400"}
+        if format is None:
+            headers["Vary"] = "Accept"
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        content = await asyncio.to_thread(Path(path).read_bytes)
+        return Response(content, media_type=PREVIEW_FORMATS[fmt], headers=headers)
+        
+    except HTTPException:
+        raise
+    except PageNotFoundError:
+        raise HTTPException(status_code=404, detail="Seite nicht gefunden")
+    except BlobNotFoundError:
+        raise HTTPException(status_code=404, detail="PDF nicht gefunden")
+    except PreviewUnavailableError:
+        raise HTTPException(status_code=503, detail="Vorschau nicht verfügbar")
+    except (PoolBusyError, PoolTimeoutError) as e:
+        raise extraction_unavailable(e)
+    except Exception as e:
+        logging.error(f"Error rendering preview: {e!r}")
+        raise HTTPException(status_code=500, detail="Fehler beim Erstellen der Vorschau")
+
+# What deleting an order needs to clean up after it
+DELETE_PROJECTION = {
+    "_id": 0, "id": 1, "status": 1, "upload_date": 1, "pdf_file_id": 1, "pdf_sha256": 1, "pdf_storage": 1,
+    **{field: 1 for field in SUGGEST_FIELDS},
+}
+BULK_DELETE_BATCH_SIZE = 500
+
+async def discard_order_data(orders: List[dict]):
+    # Tombstones for syncing clients, then previews, PDFs, page texts and archived copies
+    # of orders that were just deleted. Runs before the stats update, which may fail. Upserts,
+    # so an order a concurrent request already tombstoned does not fail the write and skip the
+    # cleanup; every step below is idempotent.
+    deleted_at = datetime.utcnow()
+    await db.order_tombstones.bulk_write(
+        [UpdateOne({"id": order["id"]}, {"$set": {"deleted_at": deleted_at}}, upsert=True) for order in orders],
+        ordered=False,
+    )
+    for order in orders:
+        if order.get("pdf_sha256"):
+            preview_cache.discard(order["pdf_sha256"])
+        if order.get("pdf_file_id"):
+            try:
+                await blob_store_for(order).delete(order["pdf_file_id"])
+            except BlobNotFoundError:
+                logging.warning(f"PDF of deleted order {order['id']} is in an unconfigured archive store")
+    order_ids = [order["id"] for order in orders]
+    await db.order_pages.delete_many({"order_id": {"$in": order_ids}})
+    archived_ids = [order["id"] for order in orders if order.get("status") == "archived"]
+    if archived_ids:
+        await db.orders_archive.delete_many({"id": {"$in": archived_ids}})
+
 @api_router.delete("/order/{order_id}")
 async def delete_order(order_id: str):
     try:
-        result = await db.orders.delete_one({"id": order_id})
-        if result.deleted_count == 0:
+        order = await db.orders.find_one_and_delete({"id": order_id}, projection=DELETE_PROJECTION)
+        if not order:
             raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+        # Cleanup first: the delete has committed, a failing stats update must not skip it
+        await discard_order_data([order])
+        await record_orders_changed(removed=[order])
         
         return {"message": "Auftrag erfolgreich gelöscht"}
         
@@ -257,16 +1493,274 @@ async def delete_order(order_id: str):
         logging.error(f"Error deleting order: {e}")
         raise HTTPException(status_code=500, detail="Fehler beim Löschen des Auftrags")
 
-# Include the router in the main app
-app.include_router(api_router)
+def bulk_delete_query(request: BulkDeleteRequest) -> dict:
+    query = {}
+    if request.order_ids is not None:
+        query["id"] = {"$in": request.order_ids}
+    upload_date = {}
+    if request.uploaded_before:
+        upload_date["$lt"] = request.uploaded_before
+    if request.uploaded_after:
+        upload_date["$gte"] = request.uploaded_after
+    if upload_date:
+        query["upload_date"] = upload_date
+    # Exact matches only, a fuzzy search term is too easy to get wrong for a delete
+    for field in ("customer_name", "stone_type"):
+        if getattr(request, field) is not None:
+            query[field] = getattr(request, field)
+    if request.status:
+        query["status"] = {"$in": request.status}
+    if not query:
+        raise HTTPException(status_code=400, detail="Mindestens ein Filter ist erforderlich")
+    return query
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@api_router.post("/orders/bulk-delete")
+async def bulk_delete_orders(request: BulkDeleteRequest):
+    query = bulk_delete_query(request)
+    try:
+        if request.dry_run:
+            return {"matched": await db.orders.count_documents(query), "deleted": 0}
+        
+        # In batches, so the cleanup of each batch sees a bounded list of orders. One delete per order:
+        # only the orders that come back were removed by this request, so a concurrent delete of the
+        # same order is never subtracted from the statistics twice.
+        deleted = 0
+        while True:
+            batch = await db.orders.find(query, projection={"_id": 0, "id": 1}).limit(
+                BULK_DELETE_BATCH_SIZE
+            ).to_list(BULK_DELETE_BATCH_SIZE)
+            if not batch:
+                break
+            removed = []
+            for order in batch:
+                # Still matching the filter: it may have changed since the batch was read
+                order = await db.orders.find_one_and_delete(
+                    {"$and": [query, {"id": order["id"]}]}, projection=DELETE_PROJECTION
+                )
+                if order:
+                    removed.append(order)
+            if removed:
+                await discard_order_data(removed)
+                await record_orders_changed(removed=removed)
+            deleted += len(removed)
+        
+        return {"matched": deleted, "deleted": deleted}
+        
+    except Exception as e:
+        logging.error(f"Error bulk deleting orders: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Löschen der Aufträge")
+
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    try:
+        report = await index_report(db.orders)
+        report["query_plans"] = await check_query_plans(db.orders)
+        return report
+        
+    except Exception as e:
+        logging.error(f"Error building index report: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Prüfen der Indizes")
+
+@api_router.get("/admin/jobs")
+async def get_job_stats():
+    try:
+        stats = await job_queue.stats()
+        dead_letters = await job_queue.dead_letters.find(
+            {}, projection={"_id": 0}
+        ).sort("failed_at", -1).limit(20).to_list(20)
+        return {"counts": stats, "recent_dead_letters": dead_letters}
+        
+    except Exception as e:
+        logging.error(f"Error fetching job stats: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Laden der Hintergrundaufgaben")
+
+@api_router.post("/admin/archive")
+async def run_archival(older_than_days: Optional[int] = Query(None, ge=1), dry_run: bool = Query(False)):
+    # Queues an archival run now instead of waiting for the schedule
+    days = older_than_days or ARCHIVE_AFTER_DAYS
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="Kein Archivierungsalter angegeben (older_than_days)")
+    try:
+        if dry_run:
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            return {"older_than_days": days, "matched": await db.orders.count_documents(archive_query(cutoff))}
+        # False if a run is already pending, that run archives with its own age
+        return {"older_than_days": days, "queued": await enqueue_archive_orders(days)}
+        
+    except Exception as e:
+        logging.error(f"Error queueing archival: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Starten der Archivierung")
+
+@api_router.post("/admin/stats/rebuild")
+async def rebuild_stats():
+    # Recomputes the rollup from the orders collection, e.g. after restoring a backup
+    try:
+        rows = await rebuild_rollup(db.orders, db.order_stats)
+        # Nothing to apply, but cached /api/stats responses must go
+        await orders_changed()
+        return {"rows": rows}
+        
+    except Exception as e:
+        logging.error(f"Error rebuilding stats: {e}")
+        raise HTTPException(status_code=500, detail="Fehler beim Neuberechnen der Statistik")
+
+@api_router.get("/admin/db")
+async def get_db_stats():
+    options = mongo_client_options()
+    return {
+        "pool": mongo_pool_stats.snapshot(),
+        "max_pool_size": options["maxPoolSize"],
+        "wait_queue_timeout_ms": options["waitQueueTimeoutMS"],
+        "compressors": options.get("compressors"),
+        "list_read_preference": orders_read.read_preference.document,
+    }
+
+def open_resources(settings: AppSettings, mongo_client=None):
+    """Create the MongoDB client and bind the database handles, PDF stores, job queue and preview cache.
+
+    With ``mongo_client`` (tests, benchmarks) that client is used instead of
+    one built from ``settings.mongo_url``; closing it stays with the caller.
+    """
+    global client, db, orders_read, list_reads_cacheable, blob_store, archive_blob_store, orders_version, job_queue
+    global suggest_version, preview_cache
+    if mongo_client is None:
+        listeners = [mongo_pool_stats] + ([MongoCommandMetrics()] if settings.metrics_enabled else [])
+        mongo_client = create_mongo_client(settings.mongo_url, listeners)
+    client = mongo_client
+    db = client[settings.db_name]
+    orders_read = db.orders.with_options(read_preference=list_read_preference(RESPONSE_CACHE_ENABLED))
+    list_reads_cacheable = orders_read.read_preference == Primary()
+    blob_store = create_blob_store(db)
+    archive_blob_store = (
+        create_blob_store(db, prefix="ARCHIVE_PDF", default_name="pdf_archive", default_bucket="pdfs_archive")
+        if os.environ.get('ARCHIVE_PDF_STORAGE') else None
+    )
+    orders_version = CollectionVersion(
+        db.meta, "orders_version", ttl=float(os.environ.get('ORDERS_VERSION_TTL', '1')),
+    )
+    suggest_version = CollectionVersion(
+        db.meta, "suggest_version", ttl=float(os.environ.get('ORDERS_VERSION_TTL', '1')),
+    )
+    job_queue = JobQueue(
+        db,
+        max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '5')),
+        base_delay=float(os.environ.get('JOB_RETRY_DELAY', '2')),
+        lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', '300')),
+    )
+    preview_cache = PreviewCache(
+        os.environ.get('PREVIEW_CACHE_DIR') or ROOT_DIR / 'preview_cache',
+        max_bytes=int(os.environ.get('PREVIEW_CACHE_MAX_BYTES', str(512 * 1024 * 1024))),
+    )
+
+async def connect_db():
+    # The client is created without connecting; open the pool here so a bad URL shows up at boot
+    try:
+        await client.admin.command("ping")
+    except Exception as e:
+        logging.error(f"MongoDB not reachable at startup: {e}")
+        raise
+
+async def load_extraction_config():
+    # Compile the field patterns now so a broken config fails at boot, not on the first upload
+    get_engine()
+    if OCR_REQUESTED and not OCR_ENABLED:
+        logging.warning("OCR disabled: pytesseract, the tesseract binary or pypdfium2 is missing")
+
+async def bootstrap_schema():
+    await bootstrap_orders(db.orders)
+    await ensure_indexes(db.upload_jobs, UPLOAD_JOB_INDEXES)
+    await ensure_indexes(db.order_pages, ORDER_PAGE_INDEXES)
+    await ensure_indexes(db.jobs, JOB_INDEXES)
+    await ensure_indexes(db.orders_archive, ARCHIVE_INDEXES)
+    await ensure_indexes(db.order_stats, STATS_INDEXES)
+    await ensure_indexes(db.order_tombstones, tombstone_indexes(TOMBSTONE_RETENTION_DAYS * 86400))
+    # First start with the rollup: fill it from the existing orders. Full rebuilds are left to
+    # rebuild_stats.py and /api/admin/stats/rebuild.
+    rows = await build_missing_rollup(db.orders, db.order_stats, db.meta)
+    if rows is not None:
+        logging.info(f"Built statistics rollup with {rows} rows")
+
+def start_background_tasks(settings: AppSettings) -> asyncio.Event:
+    # The suggest index and the sweep for orders without a job run in the background so a large
+    # collection does not delay startup. The returned event stops the embedded worker and the
+    # archival schedule.
+    stop = asyncio.Event()
+    schedule_suggest_rebuild()
+    run_in_background(enqueue_stranded_orders())
+    if settings.run_embedded_worker:
+        worker = Worker(job_queue, JOB_HANDLERS, concurrency=settings.worker_concurrency)
+        run_in_background(worker.run(stop))
+    if ARCHIVE_AFTER_DAYS > 0:
+        run_in_background(schedule_archival(stop))
+    return stop
+
+async def stop_background_tasks(stop: asyncio.Event):
+    stop.set()
+    await asyncio.gather(*background_jobs, return_exceptions=True)
+
+def shutdown_pools():
+    extraction_pool.shutdown()
+    ocr_pool.shutdown()
+    preview_pool.shutdown()
+
+async def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def create_app(settings: Optional[AppSettings] = None, mongo_client=None) -> FastAPI:
+    """Build the API app; ``settings`` default to the environment.
+
+    Nothing connects here: the MongoDB client is opened in the lifespan and
+    closed with it, together with the worker pools. Serve with
+    ``uvicorn server:app`` or ``uvicorn --factory server:create_app``.
+    """
+    settings = settings or AppSettings.from_env()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        open_resources(settings, mongo_client)
+        stop = None
+        try:
+            await connect_db()
+            await load_extraction_config()
+            await bootstrap_schema()
+            stop = start_background_tasks(settings)
+            yield
+        finally:
+            if stop is not None:
+                await stop_background_tasks(stop)
+            shutdown_pools()
+            if mongo_client is None:
+                client.close()
+
+    app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+    app.state.settings = settings
+    app.include_router(api_router)
+
+    # Oversized uploads are refused before Starlette spools the multipart body to disk
+    app.add_middleware(
+        RequestSizeLimitMiddleware,
+        limits={
+            f"{api_router.prefix}/upload-pdf": MAX_UPLOAD_SIZE,
+            f"{api_router.prefix}/upload-pdfs": BATCH_MAX_REQUEST_SIZE,
+        },
+        detail=too_large_detail,
+    )
+
+    # JSON and NDJSON responses go out brotli- or gzip-compressed when the client accepts it.
+    # Added before the metrics middleware, so it runs inside it and the request timings include compression
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.add_api_route("/metrics", get_metrics, methods=["GET"], include_in_schema=False)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
 
 # Configure logging
 logging.basicConfig(
@@ -275,6 +1769,4 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+app = create_app()
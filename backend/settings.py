@@ -0,0 +1,166 @@
+import importlib.util
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# Wire compressors and the package each needs; zlib ships with Python
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _bool_env(name: str, default: bool) -> bool:
+    return os.environ.get(name, "true" if default else "false").lower() == "true"
+
+
+class AppSettings(NamedTuple):
+    """What ``server.create_app`` needs to build and start the app.
+
+    Tuning knobs (pools, caches, timeouts) are still read from the
+    environment by the modules that use them.
+    """
+
+    mongo_url: str
+    db_name: str
+    metrics_enabled: bool = True
+    compression_min_size: int = 1024
+    run_embedded_worker: bool = True
+    worker_concurrency: int = 2
+
+    @classmethod
+    def from_env(cls) -> "AppSettings":
+        return cls(
+            mongo_url=os.environ["MONGO_URL"],
+            db_name=os.environ["DB_NAME"],
+            metrics_enabled=_bool_env("METRICS_ENABLED", True),
+            # Responses smaller than this are sent uncompressed; the headers would eat most of the saving
+            compression_min_size=_int_env("COMPRESSION_MIN_SIZE", 1024),
+            run_embedded_worker=_bool_env("RUN_EMBEDDED_WORKER", True),
+            worker_concurrency=_int_env("WORKER_CONCURRENCY", 2),
+        )
+
+
+def available_compressors(names: str) -> str:
+    # pymongo warns on every client for compressors it cannot load, skip those up front
+    wanted = [name.strip() for name in names.split(",") if name.strip()]
+    return ",".join(
+        name for name in wanted
+        if name in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[name]) is not None
+    )
+
+
+def mongo_client_options() -> dict:
+    """Client options from MONGO_* variables; every pool and timeout has a bounded default.
+
+    The pool size is per process, so with several uvicorn workers the server
+    sees up to workers * MONGO_MAX_POOL_SIZE connections.
+    """
+    compressors = available_compressors(os.environ.get("MONGO_COMPRESSORS", "zstd,snappy,zlib"))
+    options = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 50),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_MS", 60000),
+        # Fail a request that waits this long for a free connection instead of queueing forever
+        "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 30000),
+        "retryReads": True,
+        "retryWrites": True,
+    }
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def list_read_preference(cache_enabled: bool = False):
+    """Read preference for list and search queries, which tolerate replication lag.
+
+    Defaults to the primary when responses are cached: a lagging secondary read
+    would be cached under the current orders version and served until the next
+    write. Secondaries are never more than ``MONGO_MAX_STALENESS_SECONDS`` behind
+    (90, the smallest value MongoDB accepts).
+    """
+    name = os.environ.get("MONGO_LIST_READ_PREFERENCE", "primary" if cache_enabled else "secondaryPreferred")
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {name}")
+    if name == "primary":
+        return Primary()
+    return READ_PREFERENCES[name](max_staleness=_int_env("MONGO_MAX_STALENESS_SECONDS", 90))
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server, fed by pymongo's CMAP events.
+
+    Events arrive on Motor's executor threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = defaultdict(Counter)
+
+    def _count(self, event, key: str, delta: int = 1):
+        address = "%s:%s" % event.address
+        with self._lock:
+            self._servers[address][key] += delta
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {address: dict(counts) for address, counts in self._servers.items()}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count(event, "pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count(event, "created")
+        self._count(event, "open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count(event, "closed")
+        self._count(event, "open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count(event, f"check_out_failed_{event.reason}")
+
+    def connection_checked_out(self, event):
+        self._count(event, "checked_out")
+        self._count(event, "in_use")
+
+    def connection_checked_in(self, event):
+        self._count(event, "in_use", -1)
+
+
+def create_mongo_client(url: str, listeners: Sequence = ()) -> AsyncIOMotorClient:
+    # connect=False: no sockets or monitor threads until the first operation or the startup ping
+    return AsyncIOMotorClient(url, connect=False, event_listeners=list(listeners), **mongo_client_options())
@@ -0,0 +1,127 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from schema import STATS_INDEXES, ensure_indexes
+
+# Rollup rows are {"dimension", "value", "count"}; "total" has the single value "all"
+# and "month" values are "YYYY-MM" of the upload date in UTC.
+COUNTED_FIELDS = ("stone_type", "customer_name")
+# Lock document (in the meta collection) held by the process filling an empty rollup
+BUILD_LOCK_ID = "order_stats_build"
+
+
+def rollup_keys(order: dict) -> List[Tuple[str, str]]:
+    # Fields missing from a partial document (e.g. only the extracted fields) are left alone
+    keys = [("total", "all")]
+    for field in COUNTED_FIELDS:
+        if isinstance(order.get(field), str):
+            keys.append((field, order[field]))
+    if isinstance(order.get("upload_date"), datetime):
+        keys.append(("month", f"{order['upload_date']:%Y-%m}"))
+    return keys
+
+
+def rollup_deltas(added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> Dict[Tuple[str, str], int]:
+    deltas = Counter()
+    for order in added:
+        deltas.update(rollup_keys(order))
+    for order in removed:
+        deltas.subtract(rollup_keys(order))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+async def apply_rollup(collection, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    """Fold inserted and deleted orders into the rollup with one ``$inc`` upsert per touched row."""
+    deltas = rollup_deltas(added, removed)
+    if not deltas:
+        return
+    await collection.bulk_write(
+        [
+            UpdateOne({"dimension": dimension, "value": value}, {"$inc": {"count": delta}}, upsert=True)
+            for (dimension, value), delta in deltas.items()
+        ],
+        ordered=False,
+    )
+    if any(delta < 0 for delta in deltas.values()):
+        await collection.delete_many({"count": {"$lte": 0}, "dimension": {"$ne": "total"}})
+
+
+async def compute_rollup(orders) -> List[dict]:
+    rows = [{"dimension": "total", "value": "all", "count": await orders.count_documents({})}]
+    groups = {field: f"${field}" for field in COUNTED_FIELDS}
+    groups["month"] = {"$dateToString": {"format": "%Y-%m", "date": "$upload_date"}}
+    for dimension, key in groups.items():
+        async for row in orders.aggregate([{"$group": {"_id": key, "count": {"$sum": 1}}}]):
+            if isinstance(row["_id"], str):
+                rows.append({"dimension": dimension, "value": row["_id"], "count": row["count"]})
+    return rows
+
+
+async def rebuild_rollup(orders, collection) -> int:
+    """Recompute the rollup from scratch and swap it in; returns the number of rows.
+
+    Writes that land while the aggregation runs are not reflected, run it
+    during a quiet period.
+    """
+    rows = await compute_rollup(orders)
+    # Unique, so two rebuilds at once cannot drop each other's staging collection
+    staging = collection.database[f"{collection.name}_rebuild_{uuid.uuid4().hex[:8]}"]
+    await ensure_indexes(staging, STATS_INDEXES)
+    await staging.insert_many(rows)
+    await staging.rename(collection.name, dropTarget=True)
+    return len(rows)
+
+
+async def _is_empty(collection) -> bool:
+    return await collection.find_one({}, projection={"_id": 1}) is None
+
+
+async def build_missing_rollup(orders, collection, locks, lease_seconds: float = 600) -> Optional[int]:
+    """Fill the rollup on the first start with orders but no rollup; returns the rows, None if skipped.
+
+    Every API process runs this at startup, so only the one holding the lock
+    document in ``locks`` builds; a lock older than ``lease_seconds`` belongs to
+    a process that died and is taken over.
+    """
+    if not await _is_empty(collection) or await _is_empty(orders):
+        return None
+    now = datetime.utcnow()
+    lock = {"locked_until": now + timedelta(seconds=lease_seconds)}
+    try:
+        await locks.insert_one({"_id": BUILD_LOCK_ID, **lock})
+    except DuplicateKeyError:
+        if await locks.find_one_and_update(
+            {"_id": BUILD_LOCK_ID, "locked_until": {"$lt": now}}, {"$set": lock}
+        ) is None:
+            return None
+    try:
+        # Another process may have finished between the check above and taking the lock
+        if not await _is_empty(collection):
+            return None
+        return await rebuild_rollup(orders, collection)
+    finally:
+        await locks.delete_one({"_id": BUILD_LOCK_ID})
+
+
+async def read_stats(collection, customer_limit: int) -> dict:
+    # A handful of indexed reads, independent of how many orders exist
+    projection = {"_id": 0, "value": 1, "count": 1}
+    total = await collection.find_one({"dimension": "total"}, projection=projection)
+    stone_types = await collection.find({"dimension": "stone_type"}, projection=projection).sort(
+        "count", -1
+    ).to_list(None)
+    customers = await collection.find({"dimension": "customer_name"}, projection=projection).sort(
+        "count", -1
+    ).limit(customer_limit).to_list(customer_limit)
+    months = await collection.find({"dimension": "month"}, projection=projection).sort("value", 1).to_list(None)
+    return {
+        "total": total["count"] if total else 0,
+        "stone_types": stone_types,
+        "customers": customers,
+        "months": months,
+    }
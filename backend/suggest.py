@@ -0,0 +1,146 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from search import fold
+
+SUGGEST_FIELDS = ("order_number", "customer_name", "stone_type")
+# Fields ranked by how many orders share a value; order numbers are unique and stay sorted
+COUNTED_FIELDS = {"customer_name", "stone_type"}
+# Upper bound of prefix matches looked at per counted field, keeps short prefixes sub-millisecond
+MAX_SCAN = 2000
+
+
+class SuggestIndex:
+    """In-memory prefix index over order numbers, customer names and stone types.
+
+    Each field keeps a sorted list of ``(folded key, value)`` pairs, so a prefix
+    lookup is one bisect plus a short scan. Customer names are also keyed by
+    every later word, so "mül" finds "Max Müller". Values are reference
+    counted, which lets uploads and deletes update the index in place.
+
+    ``version`` is the suggest version the index is known to match; a higher
+    version in the database means another process changed a suggested value
+    and a rebuild is due. Writes that leave the suggested values alone (the
+    index jobs, archival) do not bump it.
+    """
+
+    def __init__(self, ignore_values: Iterable[str] = ()):
+        self.ignore_values = set(ignore_values)
+        self.version = -1
+        self._reset()
+
+    def _reset(self):
+        self._keys: Dict[str, List[Tuple[str, str]]] = {field: [] for field in SUGGEST_FIELDS}
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self):
+        return len(self._counts)
+
+    @staticmethod
+    def keys_for(field: str, value: str) -> List[str]:
+        folded = fold(value)
+        if field != "customer_name":
+            return [folded]
+        words = folded.split()
+        return [" ".join(words[i:]) for i in range(len(words))] or [folded]
+
+    def _add_value(self, field: str, value: str, count: int = 1):
+        if not value or value in self.ignore_values:
+            return
+        key = (field, value)
+        if key not in self._counts:
+            for folded in self.keys_for(field, value):
+                insort(self._keys[field], (folded, value))
+            self._counts[key] = 0
+        self._counts[key] += count
+
+    def _remove_value(self, field: str, value: str):
+        key = (field, value)
+        if key not in self._counts:
+            return
+        self._counts[key] -= 1
+        if self._counts[key] > 0:
+            return
+        del self._counts[key]
+        entries = self._keys[field]
+        for folded in self.keys_for(field, value):
+            index = bisect_left(entries, (folded, value))
+            if index < len(entries) and entries[index] == (folded, value):
+                del entries[index]
+
+    def _values(self, order: dict) -> List[Tuple[str, str]]:
+        return [
+            (field, order[field]) for field in SUGGEST_FIELDS
+            if isinstance(order.get(field), str) and order[field] and order[field] not in self.ignore_values
+        ]
+
+    def changes(self, added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> bool:
+        """Whether a write adds or removes any value the index would hold."""
+        deltas = Counter()
+        for order in added:
+            deltas.update(self._values(order))
+        for order in removed:
+            deltas.subtract(self._values(order))
+        return any(deltas.values())
+
+    def add(self, order: dict):
+        for field in SUGGEST_FIELDS:
+            self._add_value(field, order.get(field))
+
+    def remove(self, order: dict):
+        for field in SUGGEST_FIELDS:
+            self._remove_value(field, order.get(field))
+
+    def apply(self, version: int, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+        """Apply one local write; ``version`` is the suggest version that write produced."""
+        for order in removed:
+            self.remove(order)
+        for order in added:
+            self.add(order)
+        # Only stay in sync if no other process wrote in between
+        if version == self.version + 1:
+            self.version = version
+
+    def load(self, version: int, counts: Dict[str, Iterable[Tuple[str, int]]]):
+        """Replace the index contents with ``{field: [(value, count), ...]}``."""
+        self._reset()
+        for field, rows in counts.items():
+            for value, count in rows:
+                if isinstance(value, str):
+                    self._add_value(field, value, count)
+        self.version = version
+
+    def suggest(self, prefix: str, limit: int = 8, field: Optional[str] = None) -> List[dict]:
+        folded = fold(prefix.strip())
+        if not folded:
+            return []
+        results = []
+        for name in ([field] if field else SUGGEST_FIELDS):
+            entries = self._keys[name]
+            index = bisect_left(entries, (folded,))
+            seen = set()
+            matches = []
+            scan_limit = MAX_SCAN if name in COUNTED_FIELDS else limit
+            while index < len(entries) and len(matches) < scan_limit:
+                key, value = entries[index]
+                if not key.startswith(folded):
+                    break
+                if value not in seen:
+                    seen.add(value)
+                    matches.append({"field": name, "value": value, "count": self._counts[(name, value)]})
+                index += 1
+            if name in COUNTED_FIELDS:
+                matches.sort(key=lambda m: (-m["count"], m["value"]))
+            results.extend(matches[:limit])
+        # Exact-prefix order numbers first, then the most common names and materials
+        results.sort(key=lambda m: (m["field"] != "order_number", -m["count"]))
+        return results[:limit]
+
+
+async def load_suggest_counts(collection) -> Dict[str, List[Tuple[str, int]]]:
+    counts = {}
+    for field in SUGGEST_FIELDS:
+        rows = await collection.aggregate([{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]).to_list(None)
+        counts[field] = [(row["_id"], row["count"]) for row in rows]
+    return counts
@@ -0,0 +1,76 @@
+"""Compressed storage of extracted PDF text.
+
+Orders keep their text as ``extracted_text_z`` (compressed bytes) plus
+``search_text``, the distinct words of the text, which is all the ``$text``
+index needs. Page rows keep ``text_z``. Documents written before compression
+still carry plain ``extracted_text`` / ``text`` strings; every reader goes
+through ``decompress_text``, which accepts both.
+"""
+import re
+import zlib
+from typing import Union
+
+try:
+    import zstandard
+except ImportError:  # texts are deflated instead; zstd ones then cannot be read back
+    zstandard = None
+
+# First byte of every stored value names the codec, so both can coexist in one collection
+ZSTD = b"Z"
+DEFLATE = b"D"
+ZSTD_LEVEL = 3
+DEFLATE_LEVEL = 6
+
+TEXT_FIELD = "extracted_text_z"
+TERMS_FIELD = "search_text"
+PAGE_TEXT_FIELD = "text_z"
+
+
+def compress_text(text: str) -> bytes:
+    if not text:
+        return b""
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return DEFLATE + zlib.compress(data, DEFLATE_LEVEL)
+
+
+def decompress_text(value: Union[bytes, str, None]) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    codec, payload = value[:1], value[1:]
+    if not codec:
+        return ""
+    if codec == DEFLATE:
+        return zlib.decompress(payload).decode("utf-8")
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Text is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text codec {codec!r}")
+
+
+def index_terms(text: str) -> str:
+    # Searches only ever match single words, so each distinct word once is enough for the
+    # text index. Relevance no longer counts repetitions in the body text.
+    return " ".join(dict.fromkeys(word.lower() for word in re.findall(r"\w+", text)))
+
+
+def text_fields(text: str) -> dict:
+    return {TEXT_FIELD: compress_text(text), TERMS_FIELD: index_terms(text)}
+
+
+def pop_text(order: dict) -> str:
+    """Remove the stored text fields from an order document and return the plain text."""
+    compressed = order.pop(TEXT_FIELD, None)
+    legacy = order.pop("extracted_text", None)
+    order.pop(TERMS_FIELD, None)
+    return decompress_text(compressed if compressed is not None else legacy)
+
+
+def page_text(page: dict) -> str:
+    compressed = page.pop(PAGE_TEXT_FIELD, None)
+    return decompress_text(compressed if compressed is not None else page.get("text"))
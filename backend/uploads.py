@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import zipfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised while spooling once an upload exceeds the configured size."""
+
+
+class TooManyFilesError(Exception):
+    """Raised when an archive holds more entries than a batch may contain."""
+
+
+class SpooledUpload:
+    """An uploaded file copied to disk, with its size and SHA-256 computed on the way."""
+
+    def __init__(self, filename: str, path: str, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class RequestSizeLimitMiddleware:
+    """Rejects upload requests whose body exceeds a per-path limit, before the multipart parser stores it.
+
+    Starlette spools the whole multipart body to temp files before the handler
+    runs, so the limit in ``spool_upload`` bounds neither bandwidth nor temp
+    disk. A declared Content-Length over the limit is answered with 413 right
+    away; otherwise the body is counted as it arrives and the request fails
+    with 413 once it crosses the limit. ``slack`` covers the multipart framing
+    around the file bytes.
+    """
+
+    def __init__(self, app, limits: Dict[str, int], detail: Callable[[int], str], slack: int = 64 * 1024):
+        self.app = app
+        self.limits = limits
+        self.detail = detail
+        self.slack = slack
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        for key, value in scope.get("headers") or []:
+            if key.lower() == b"content-length" and value.isdigit() and int(value) > limit + self.slack:
+                response = JSONResponse({"detail": self.detail(limit)}, status_code=413)
+                await response(scope, receive, send)
+                return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit + self.slack:
+                    # FastAPI passes HTTPExceptions raised while reading the body on unchanged
+                    raise HTTPException(status_code=413, detail=self.detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _new_temp_file(tmp_dir: Optional[str], suffix: str):
+    return tempfile.NamedTemporaryFile(delete=False, dir=tmp_dir, prefix="upload-", suffix=suffix)
+
+
+async def spool_upload(file: UploadFile, max_size: int, tmp_dir: Optional[str] = None) -> SpooledUpload:
+    """Copy an upload to a temp file chunk by chunk so it is never fully held in memory."""
+    hasher = hashlib.sha256()
+    size = 0
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    tmp = _new_temp_file(tmp_dir, suffix)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError()
+            hasher.update(chunk)
+            await asyncio.to_thread(tmp.write, chunk)
+        tmp.close()
+    except BaseException:
+        tmp.close()
+        os.unlink(tmp.name)
+        raise
+    return SpooledUpload(file.filename, tmp.name, size, hasher.hexdigest())
+
+
+def _spool_stream(source, filename: str, max_size: int, tmp_dir: Optional[str]) -> SpooledUpload:
+    hasher = hashlib.sha256()
+    size = 0
+    with _new_temp_file(tmp_dir, ".pdf") as tmp:
+        try:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError()
+                hasher.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return SpooledUpload(filename, tmp.name, size, hasher.hexdigest())
+
+
+def spool_zip_entries(
+    zip_path: str, max_size: int, max_entries: int, tmp_dir: Optional[str] = None
+) -> List[Tuple[str, Optional[SpooledUpload], Optional[str]]]:
+    """Unpack the PDFs of an archive to temp files; blocking, run it in a thread.
+
+    Returns ``(filename, upload, error)`` tuples. The size limit is enforced on
+    the decompressed bytes, not on the sizes the archive claims.
+    """
+    entries = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if len(entries) >= max_entries:
+                    raise TooManyFilesError()
+                if not info.filename.lower().endswith('.pdf'):
+                    entries.append((info.filename, None, "Nur PDF-Dateien sind erlaubt"))
+                    continue
+                try:
+                    with archive.open(info) as source:
+                        entries.append((info.filename, _spool_stream(source, info.filename, max_size, tmp_dir), None))
+                except UploadTooLargeError:
+                    entries.append((info.filename, None, "Datei zu groß"))
+    except BaseException:
+        cleanup_entries(entries)
+        raise
+    return entries
+
+
+def cleanup_entries(entries: List[tuple]):
+    for _, upload, _ in entries:
+        if upload is not None:
+            upload.cleanup()
@@ -0,0 +1,46 @@
+"""Standalone worker for the durable job queue.
+
+Run from the repository root with ``python -m backend.worker`` (or
+``python worker.py`` from the backend directory). Set
+``RUN_EMBEDDED_WORKER=false`` on the API processes when dedicated workers
+are used.
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import server  # noqa: E402
+from jobs import Worker  # noqa: E402
+from settings import AppSettings  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    server.open_resources(AppSettings.from_env())
+    await server.ensure_indexes(server.db.jobs, server.JOB_INDEXES)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = Worker(
+        server.job_queue,
+        server.JOB_HANDLERS,
+        concurrency=int(os.environ.get('WORKER_CONCURRENCY', server.extraction_pool.workers)),
+    )
+    try:
+        await worker.run(stop)
+    finally:
+        server.shutdown_pools()
+        server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
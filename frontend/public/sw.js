@@ -9,6 +9,146 @@ const urlsToCache = [
   '/icon-512x512.png'
 ];
 
+// Lokale Kopie der Auftragsliste in IndexedDB. Sie wird über /api/orders/changes
+// inkrementell abgeglichen, übertragen werden also nur geänderte und gelöschte Aufträge.
+const ORDERS_DB_NAME = 'steinmetz-orders';
+const ORDERS_DB_VERSION = 1;
+const ORDERS_PAGE_SIZE = 100;
+const ORDERS_MAX_PAGE_SIZE = 500;
+
+function openOrdersDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(ORDERS_DB_NAME, ORDERS_DB_VERSION);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore('orders', { keyPath: 'id' });
+      request.result.createObjectStore('meta');
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function requestResult(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function transactionDone(transaction) {
+  return new Promise((resolve, reject) => {
+    transaction.oncomplete = () => resolve();
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+}
+
+// Jede Seite wird zusammen mit ihrem Token gespeichert, ein abgebrochener Abgleich setzt dort wieder an
+function applyChanges(db, changes) {
+  const transaction = db.transaction(['orders', 'meta'], 'readwrite');
+  const orders = transaction.objectStore('orders');
+  if (changes.reset) {
+    orders.clear();
+  }
+  changes.orders.forEach((order) => orders.put(order));
+  changes.deleted.forEach((id) => orders.delete(id));
+  transaction.objectStore('meta').put(changes.next, 'token');
+  return transactionDone(transaction);
+}
+
+let syncInFlight = null;
+
+// Nur ein Abgleich zur Zeit, gleichzeitige Anfragen warten auf denselben
+function syncOrders(changesUrl) {
+  if (!syncInFlight) {
+    syncInFlight = (async () => {
+      const db = await openOrdersDb();
+      try {
+        let token = await requestResult(db.transaction('meta').objectStore('meta').get('token'));
+        let hasMore = true;
+        while (hasMore) {
+          const url = new URL(changesUrl);
+          if (token) {
+            url.searchParams.set('since', token);
+          }
+          const response = await fetch(url, { cache: 'no-store' });
+          if (!response.ok) {
+            throw new Error(`Abgleich fehlgeschlagen: ${response.status}`);
+          }
+          const changes = await response.json();
+          await applyChanges(db, changes);
+          token = changes.next;
+          hasMore = changes.has_more;
+        }
+      } finally {
+        db.close();
+      }
+    })().finally(() => {
+      syncInFlight = null;
+    });
+  }
+  return syncInFlight;
+}
+
+// Gleiche Reihenfolge und gleiches Cursor-Format wie GET /api/orders im Backend
+function compareOrders(a, b) {
+  if (a.upload_date !== b.upload_date) {
+    return a.upload_date < b.upload_date ? 1 : -1;
+  }
+  return a.id < b.id ? 1 : -1;
+}
+
+function encodeCursor(order) {
+  return btoa(JSON.stringify({ d: order.upload_date, i: order.id }))
+    .replace(/\+/g, '-')
+    .replace(/\//g, '_')
+    .replace(/=+$/, '');
+}
+
+// Nur die erste Seite der einfachen Liste; Cursor, Zusatzfelder und Streaming gehen ans Netz
+function isOrderListRequest(url) {
+  return url.pathname.endsWith('/api/orders') && [...url.searchParams.keys()].every((key) => key === 'limit');
+}
+
+async function ordersFromReplica(request) {
+  const url = new URL(request.url);
+  const limit = Math.min(parseInt(url.searchParams.get('limit'), 10) || ORDERS_PAGE_SIZE, ORDERS_MAX_PAGE_SIZE);
+
+  let offline = false;
+  try {
+    await syncOrders(`${url.origin}${url.pathname}/changes`);
+  } catch (error) {
+    console.log('Service Worker: Abgleich nicht möglich, nutze lokale Kopie', error);
+    offline = true;
+  }
+
+  const db = await openOrdersDb();
+  let orders;
+  let token;
+  try {
+    const transaction = db.transaction(['orders', 'meta']);
+    orders = await requestResult(transaction.objectStore('orders').getAll());
+    token = await requestResult(transaction.objectStore('meta').get('token'));
+  } finally {
+    db.close();
+  }
+  if (!token) {
+    // Noch nie abgeglichen, es gibt keine lokale Kopie
+    throw new Error('Keine lokale Kopie der Aufträge');
+  }
+
+  orders.sort(compareOrders);
+  const page = orders.slice(0, limit);
+  const body = {
+    orders: page,
+    next_cursor: orders.length > limit ? encodeCursor(page[page.length - 1]) : null,
+    offline,
+  };
+  return new Response(JSON.stringify(body), {
+    headers: { 'Content-Type': 'application/json' },
+  });
+}
+
 // Install Event - Cache wichtige Ressourcen
 self.addEventListener('install', (event) => {
   console.log('Service Worker: Install Event');
@@ -52,6 +192,18 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
+  // Auftragsliste aus der lokalen Kopie, auch wenn das Backend auf einer anderen Domain läuft
+  const requestUrl = new URL(event.request.url);
+  if (isOrderListRequest(requestUrl)) {
+    event.respondWith(
+      ordersFromReplica(event.request).catch((error) => {
+        console.log('Service Worker: Lokale Kopie nicht verfügbar', error);
+        return fetch(event.request);
+      })
+    );
+    return;
+  }
+
   // Skip cross-origin requests
   if (!event.request.url.startsWith(self.location.origin)) {
     return;
@@ -4,6 +4,9 @@ import axios from "axios";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const SUGGEST_DEBOUNCE_MS = 150;
+// Matches the width the backend prewarms at upload time; shown at half size for sharp tablet screens
+const PREVIEW_WIDTH = 320;
 
 function App() {
   const [activeTab, setActiveTab] = useState('upload');
@@ -13,9 +16,12 @@ function App() {
   const [searchTerm, setSearchTerm] = useState('');
   const [searchType, setSearchType] = useState('all');
   const [searchResults, setSearchResults] = useState([]);
+  const [suggestions, setSuggestions] = useState([]);
   const [searching, setSearching] = useState(false);
   const [allOrders, setAllOrders] = useState([]);
   const [loading, setLoading] = useState(false);
+  // Set when the service worker answered from its local copy because the backend was unreachable
+  const [ordersOffline, setOrdersOffline] = useState(false);
   const [isOnline, setIsOnline] = useState(navigator.onLine);
   const [updateAvailable, setUpdateAvailable] = useState(false);
 
@@ -61,7 +67,36 @@ function App() {
     testConnection();
   }, []);
 
-  // Load all orders when switching to orders tab
+  // Suggestions while typing: debounced, and a newer keystroke cancels the pending request
+  useEffect(() => {
+    const term = searchTerm.trim();
+    if (!term || !isOnline) {
+      setSuggestions([]);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = { q: term, limit: 8 };
+        if (searchType !== 'all') {
+          params.field = searchType;
+        }
+        const response = await axios.get(`${API}/suggest`, { params, signal: controller.signal });
+        setSuggestions(response.data.suggestions);
+      } catch (error) {
+        if (!axios.isCancel(error)) {
+          console.error('Suggest error:', error);
+        }
+      }
+    }, SUGGEST_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchTerm, searchType, isOnline]);
+
+  // Load all orders when switching to orders tab; the service worker serves the list from its
+  // IndexedDB copy and only fetches what changed since the last visit
   useEffect(() => {
     if (activeTab === 'orders') {
       loadAllOrders();
@@ -73,6 +108,7 @@ function App() {
       setLoading(true);
       const response = await axios.get(`${API}/orders`);
       setAllOrders(response.data.orders);
+      setOrdersOffline(Boolean(response.data.offline));
     } catch (error) {
       console.error('Error loading orders:', error);
       if (!isOnline) {
@@ -189,11 +225,23 @@ function App() {
   const OrderCard = ({ order, showDelete = true }) => (
     <div className="bg-white rounded-lg shadow-md p-6 border-l-4 border-stone-600">
       <div className="flex justify-between items-start mb-4">
-        <div>
-          <h3 className="text-lg font-semibold text-stone-800">
-            {order.order_number}
-          </h3>
-          <p className="text-stone-600">{order.customer_name}</p>
+        <div className="flex items-start gap-4">
+          <a href={`${API}/order/${order.id}/pdf`} target="_blank" rel="noopener noreferrer">
+            <img
+              src={`${API}/order/${order.id}/preview?width=${PREVIEW_WIDTH}`}
+              alt={`Vorschau ${order.order_number}`}
+              width={PREVIEW_WIDTH / 2}
+              loading="lazy"
+              className="rounded border border-stone-200 bg-stone-50"
+              onError={(e) => { e.currentTarget.style.display = 'none'; }}
+            />
+          </a>
+          <div>
+            <h3 className="text-lg font-semibold text-stone-800">
+              {order.order_number}
+            </h3>
+            <p className="text-stone-600">{order.customer_name}</p>
+          </div>
         </div>
         {showDelete && (
           <button
@@ -364,11 +412,18 @@ function App() {
                   type="text"
                   value={searchTerm}
                   onChange={(e) => setSearchTerm(e.target.value)}
+                  list="search-suggestions"
+                  autoComplete="off"
                   placeholder="Suchbegriff eingeben..."
                   className="flex-1 p-3 border-2 border-stone-300 rounded-lg focus:border-stone-600 focus:outline-none"
                   onKeyPress={(e) => e.key === 'Enter' && searchOrders()}
                   disabled={!isOnline}
                 />
+                <datalist id="search-suggestions">
+                  {suggestions.map((suggestion) => (
+                    <option key={`${suggestion.field}:${suggestion.value}`} value={suggestion.value} />
+                  ))}
+                </datalist>
                 
                 <select
                   value={searchType}
@@ -427,14 +482,14 @@ function App() {
               </h2>
               <button
                 onClick={loadAllOrders}
-                disabled={loading || !isOnline}
+                disabled={loading}
                 className="px-4 py-2 bg-stone-600 text-white rounded-lg font-medium hover:bg-stone-700 disabled:bg-stone-300 transition-colors"
               >
                 {loading ? 'Laden...' : 'Aktualisieren'}
               </button>
             </div>
 
-            {!isOnline && (
+            {(!isOnline || ordersOffline) && (
               <div className="bg-yellow-50 border border-yellow-200 rounded-lg p-4 mb-6">
                 <p className="text-yellow-800">⚠️ Offline - Zeige zwischengespeicherte Aufträge</p>
               </div>